@@ -3,7 +3,11 @@ from setuptools import setup
 setup(name="Sudoku",
       author="Gabriel Couto Domingues",
       license="MIT",
+      python_requires=">=3.10",
       install_requires=[
           "pygame"
       ],
+      extras_require={
+          "numpy": ["numpy"]
+      },
       zip_safe=False)
\ No newline at end of file
@@ -0,0 +1,213 @@
+import mmap
+import os
+import random
+import sudoku_canonical as canonical
+import sudoku_difficulty as difficulty
+import sudoku_grid as sg
+
+
+class SudokuBank:
+    """
+    Pre-generated puzzles and their solutions stored in a memory-mapped binary file.
+
+    The file is a HEADER followed by records of RECORD_SIZE bytes: a used flag, the level, the number of clues,
+    the solution with two cells per byte and a bitmask of the clue cells. An index of the unused records by
+    (level, clues) is built when the bank is opened, so drawing a puzzle is O(1)
+    """
+
+    HEADER = b"SDKB\x01\x00\x00\x00"  # magic and version
+    SOLUTION_SIZE = (sg.SudokuGrid.GRID_SIZE + 1) // 2  # bytes of a solution
+    MASK_SIZE = (sg.SudokuGrid.GRID_SIZE + 7) // 8  # bytes of the clue bitmask
+    RECORD_SIZE = 3 + SOLUTION_SIZE + MASK_SIZE  # bytes of a record
+    USED = 1  # value of the used flag of a drawn puzzle
+    LOW = 8  # number of unused puzzles under which the bank is low
+
+    def __init__(self, path: str):
+        """
+        Opens the bank in path, creating it if it doesn't exist
+        """
+        self.path = path
+        if not os.path.exists(path) or os.path.getsize(path) < len(SudokuBank.HEADER):
+            with open(path, "wb") as file:
+                file.write(SudokuBank.HEADER)
+        self.file = open(path, "r+b")
+        self.map = None
+        self.index = {}  # (level value, clues) -> numbers of the unused records
+        self.remap()
+        if self.map[:len(SudokuBank.HEADER)] != SudokuBank.HEADER:
+            self.close()
+            raise ValueError(f"{path} isn't a puzzle bank")
+        size = self.offset(len(self))
+        if len(self.map) != size:  # a record was only partly written, so it is dropped
+            self.map.close()
+            self.map = None
+            self.file.truncate(size)
+            self.remap()
+
+        for record in range(len(self)):
+            offset = self.offset(record)
+            if self.map[offset] != SudokuBank.USED:
+                self.index.setdefault((self.map[offset + 1], self.map[offset + 2]), []).append(record)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of records, drawn or not
+        """
+        return (len(self.map) - len(SudokuBank.HEADER)) // SudokuBank.RECORD_SIZE
+
+    def remap(self):
+        """
+        Maps the file again after it changed size
+        """
+        if self.map is not None:
+            self.map.close()
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+    def close(self):
+        """
+        Closes the bank
+        """
+        if self.map is not None:
+            self.map.flush()
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    @staticmethod
+    def offset(record: int) -> int:
+        """
+        Returns the position of a record in the file
+        """
+        return len(SudokuBank.HEADER) + record * SudokuBank.RECORD_SIZE
+
+    @staticmethod
+    def pack(grid: list, sol: list, level: difficulty.SudokuGrader.Level) -> bytes:
+        """
+        Returns the record of a puzzle
+        """
+        cells = list(sol) + [0] * (2 * SudokuBank.SOLUTION_SIZE - sg.SudokuGrid.GRID_SIZE)
+        solution = bytes(cells[i] << 4 | cells[i + 1] for i in range(0, len(cells), 2))
+        mask = sum(1 << pos for pos, value in enumerate(grid) if value != sg.SudokuGrid.INVALID_VALUE)
+        clues = sg.SudokuGrid.GRID_SIZE - list(grid).count(sg.SudokuGrid.INVALID_VALUE)
+        return bytes([0, level.value, clues]) + solution + mask.to_bytes(SudokuBank.MASK_SIZE, "little")
+
+    @staticmethod
+    def unpack(record: bytes) -> tuple:
+        """
+        Returns (puzzle, solution) of a record
+        """
+        solution = []
+        for byte in record[3:3 + SudokuBank.SOLUTION_SIZE]:
+            solution += [byte >> 4, byte & 0xF]
+        del solution[sg.SudokuGrid.GRID_SIZE:]
+        mask = int.from_bytes(record[3 + SudokuBank.SOLUTION_SIZE:], "little")
+        grid = [value if mask >> pos & 1 else sg.SudokuGrid.INVALID_VALUE for pos, value in enumerate(solution)]
+        return grid, solution
+
+    def add(self, puzzles: list):
+        """
+        Appends puzzles, a list of (puzzle, solution, level), to the bank
+        """
+        first = len(self)
+        self.file.seek(self.offset(first))  # after the last whole record
+        self.file.write(b"".join(SudokuBank.pack(grid, sol, level) for grid, sol, level in puzzles))
+        self.file.flush()
+        self.remap()
+        for record, (grid, sol, level) in enumerate(puzzles, first):
+            clues = sg.SudokuGrid.GRID_SIZE - list(grid).count(sg.SudokuGrid.INVALID_VALUE)
+            self.index.setdefault((level.value, clues), []).append(record)
+
+    def keys(self, level: difficulty.SudokuGrader.Level = None, clues: int = None) -> list:
+        """
+        Returns the keys of the index with unused puzzles of the given level and number of clues, None matching any
+        """
+        return [key for key, records in self.index.items()
+                if records and (level is None or key[0] == level.value) and (clues is None or key[1] == clues)]
+
+    def available(self, level: difficulty.SudokuGrader.Level = None, clues: int = None) -> int:
+        """
+        Returns the number of unused puzzles of the given level and number of clues, None matching any
+        """
+        return sum(len(self.index[key]) for key in self.keys(level, clues))
+
+    def low(self, level: difficulty.SudokuGrader.Level = None) -> bool:
+        """
+        Checks if the bank has few unused puzzles of level left
+        """
+        return self.available(level) < SudokuBank.LOW
+
+    def draw(self, level: difficulty.SudokuGrader.Level = None, clues: int = None) -> tuple:
+        """
+        Returns (puzzle, solution) of a random unused puzzle of the given level and number of clues, None matching
+        any, and marks it as used. Returns None if there is no such puzzle
+        """
+        reserved = self.reserve(level, clues)
+        if reserved is None:
+            return None
+
+        record, grid, sol = reserved
+        self.use(record)
+        return grid, sol
+
+    def reserve(self, level: difficulty.SudokuGrader.Level = None, clues: int = None) -> tuple:
+        """
+        Returns (record, puzzle, solution) of a random unused puzzle of the given level and number of clues, None
+        matching any, or None if there is no such puzzle. The puzzle isn't drawn again while the bank is open, but
+        it is only marked as used in the file by use, so it is drawn again after the bank is opened again if use
+        wasn't called. compact drops the reserved puzzles
+        """
+        keys = self.keys(level, clues)
+        if not keys:
+            return None
+
+        records = self.index[random.choice(keys)]
+        i = random.randrange(len(records))
+        records[i], records[-1] = records[-1], records[i]  # so it can be removed in O(1)
+        record = records.pop()
+        offset = self.offset(record)
+        return (record, *SudokuBank.unpack(self.map[offset:offset + SudokuBank.RECORD_SIZE]))
+
+    def use(self, record: int):
+        """
+        Marks a reserved record as used
+        """
+        self.map[self.offset(record)] = SudokuBank.USED
+
+    def refill(self, count: int, level: difficulty.SudokuGrader.Level = None, dedup: canonical.SudokuDedup = None):
+        """
+        Generates count puzzles of level, or of any level if it is None, and adds them to the bank. If dedup is
+        given, puzzles that are transforms of one in it aren't added
+        """
+        self.add(SudokuBank.generate(count, level, dedup))
+
+    @staticmethod
+    def generate(count: int, level: difficulty.SudokuGrader.Level = None,
+                 dedup: canonical.SudokuDedup = None) -> list:
+        """
+        Returns count new puzzles of level, or of any level if it is None, as (puzzle, solution, level). If dedup
+        is given, puzzles that are transforms of one in it are generated again, and the new ones are added to it
+        """
+        grader = difficulty.SudokuGrader()
+        puzzles = []
+        while len(puzzles) < count:
+            sudoku = sg.SudokuGrid()
+            if grader.remove_cells(sudoku, level) and (dedup is None or dedup.add(sudoku.grid)):
+                puzzles.append((sudoku.grid, sudoku.sol, level or grader.grade(sudoku.grid)[0]))
+        return puzzles
+
+    def compact(self):
+        """
+        Rewrites the bank without the used puzzles
+        """
+        records = [self.map[self.offset(record):self.offset(record + 1)] for records in self.index.values()
+                   for record in records]
+        self.map.close()
+        self.map = None
+        self.file.seek(0)
+        self.file.write(SudokuBank.HEADER + b"".join(records))
+        self.file.truncate()
+        self.file.flush()
+        self.remap()
+        self.index = {}
+        for record, data in enumerate(records):
+            self.index.setdefault((data[1], data[2]), []).append(record)
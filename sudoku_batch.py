@@ -0,0 +1,140 @@
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import sudoku_canonical as canonical
+import sudoku_difficulty as difficulty
+import sudoku_grid as sg
+import sudoku_io as sio
+from contextlib import nullcontext
+from typing import Iterator, TextIO
+
+
+class SudokuBatch:
+    """
+    Generates many puzzles across a pool of processes, writing every puzzle as soon as it is ready instead of
+    keeping them in memory.
+
+    Puzzle i is generated after seeding random with the string "seed:i", so a batch gives the same puzzles
+    whatever the number of processes or the worker that generates each one, only the output order changes, and two
+    batch seeds never share the seed of a puzzle.
+
+    With a dedup store, the workers also compute the canonical form of every puzzle and the puzzles that are
+    transforms of one in the store are dropped, new tasks being run until there are count puzzles
+    """
+
+    FORMATS = ["jsonl", "line"]  # output formats
+
+    def __init__(self, count: int, seed: int = 0, processes: int = None,
+                 solver: sg.SudokuGrid.Solver = sg.SudokuGrid.Solver.propagate, output_format: str = "jsonl",
+                 chunk_size: int = 16, level: difficulty.SudokuGrader.Level = None,
+                 dedup: canonical.SudokuDedup = None):
+        """
+        Initializes a batch of count puzzles. processes is the size of the pool, None meaning one per CPU.
+        If level is given only puzzles of that level are generated. If dedup is given only puzzles that aren't
+        transforms of one in it are written, and they are added to it
+        """
+        if output_format not in SudokuBatch.FORMATS:
+            raise ValueError(f"unknown output format {output_format}")
+        self.count = count
+        self.seed = seed
+        self.processes = processes
+        self.solver = solver
+        self.output_format = output_format
+        self.chunk_size = chunk_size  # number of puzzles sent to a worker at a time
+        self.level = level
+        self.dedup = dedup
+
+    @staticmethod
+    def make(task: tuple) -> tuple:
+        """
+        Generates the puzzle of a task (index, seed string, solver name, level name or None, if the canonical form
+        is needed). Returns (index, seed, puzzle, solution, canonical form or None)
+        """
+        index, seed, solver, level, key = task
+        random.seed(seed)
+        grid = sg.SudokuGrid(sg.SudokuGrid.Solver[solver])
+        if level is None:
+            grid.create()
+            grid.remove_cells()
+        else:
+            while not difficulty.SudokuGrader(grid).remove_cells(grid, difficulty.SudokuGrader.Level[level]):
+                grid.reset()
+        return index, seed, grid.grid, grid.sol, canonical.SudokuCanonical.key(grid.grid) if key else None
+
+    def tasks(self, first: int, count: int) -> Iterator[tuple]:
+        """
+        Yields count tasks of the batch, starting with the task of index first
+        """
+        for index in range(first, first + count):
+            yield index, f"{self.seed}:{index}", self.solver.name, \
+                self.level.name if self.level is not None else None, self.dedup is not None
+
+    def format(self, result: tuple) -> str:
+        """
+        Returns the output line of a result of make
+        """
+        index, seed, puzzle, solution, key = result
+        if self.output_format == "line":
+            return sio.SudokuIO.serialize(puzzle).decode()
+        return json.dumps({"index": index, "seed": seed, "puzzle": sio.SudokuIO.serialize(puzzle).decode(),
+                           "solution": sio.SudokuIO.serialize(solution).decode()})
+
+    def results(self) -> Iterator[tuple]:
+        """
+        Yields the results of make in the order they are finished, without the duplicates if there is a dedup store
+        """
+        with multiprocessing.Pool(self.processes) if self.processes != 1 else nullcontext() as pool:  # no pool if 1
+            first, missing = 0, self.count
+            while missing:  # a new round of tasks replaces the duplicates
+                tasks = self.tasks(first, missing)
+                first += missing
+                for result in map(SudokuBatch.make, tasks) if pool is None else \
+                        pool.imap_unordered(SudokuBatch.make, tasks, self.chunk_size):
+                    if self.dedup is None or self.dedup.add_key(result[-1]):
+                        missing -= 1
+                        yield result
+
+    def run(self, out: TextIO = sys.stdout) -> int:
+        """
+        Generates the batch writing every puzzle to out as soon as it is ready. Returns the number of puzzles written
+        """
+        written = 0
+        for result in self.results():
+            out.write(self.format(result) + "\n")
+            written += 1
+            if written % self.chunk_size == 0:
+                out.flush()
+        out.flush()
+        return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generates sudoku puzzles across a pool of processes")
+    parser.add_argument("count", type=int, help="number of puzzles")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the batch")
+    parser.add_argument("-p", "--processes", type=int, default=None, help="size of the pool, one per CPU by default")
+    parser.add_argument("-f", "--format", choices=SudokuBatch.FORMATS, default="jsonl", help="output format")
+    parser.add_argument("--solver", choices=[solver.name for solver in sg.SudokuGrid.Solver], default="propagate",
+                        help="algorithm used to fill the grids")
+    parser.add_argument("-l", "--level", choices=[level.name for level in difficulty.SudokuGrader.Level],
+                        default=None, help="difficulty of the puzzles, any by default")
+    parser.add_argument("-o", "--output", default="-", help="output file, - being the standard output")
+    parser.add_argument("-d", "--dedup", default=None,
+                        help="file with the canonical forms of the puzzles already made, which aren't made again")
+    args = parser.parse_args()
+
+    store = canonical.SudokuDedup(args.dedup) if args.dedup is not None else None
+    batch = SudokuBatch(args.count, args.seed, args.processes, sg.SudokuGrid.Solver[args.solver], args.format,
+                        level=difficulty.SudokuGrader.Level[args.level] if args.level is not None else None,
+                        dedup=store)
+    try:
+        if args.output == "-":
+            batch.run()
+        else:
+            with open(args.output, "w") as file:
+                batch.run(file)
+    finally:
+        if store is not None:
+            store.close()
@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import sudoku_grid as sg
+import sudoku_io as sio
+from typing import Callable
+
+
+class SudokuBench:
+    """
+    Headless benchmarks of puzzle generation, solving, uniqueness checks and rendering.
+
+    Every benchmark is run with random seeded with seed + its index, so two runs time the same work. The result is
+    a dict that can be dumped as JSON and compared with the result of another run
+    """
+
+    # hard puzzles, the empty cells being "."
+    HARD = [
+        "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+        "..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9",
+        "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......",
+        "52...6.........7.13...........4..8..6......5...........418.........3..2...87.....",
+        "6.....8.3.4.7.................5.4.7.3..2.....1.6.......2.....5.....8.6......1....",
+        "48.3............71.2.......7.5....6....2..8.............1.76...3.....4......5....",
+        "....14....3....2...7..........9...3.6.1.............8.2.....1.4....5.6.....7.8...",
+        "1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1",
+    ]
+    PERCENTILES = [50, 90, 99]  # percentiles of the timings in the result
+    RENDER_RUNS = 200  # number of frames of the rendering benchmarks
+
+    def __init__(self, runs: int = 20, seed: int = 0):
+        """
+        Initializes the benchmarks. runs is the number of timed runs of each benchmark
+        """
+        self.runs = runs
+        self.seed = seed
+        self.results = {}  # name -> statistics of the benchmark
+
+    @staticmethod
+    def summary(timings: list, ops: int = 1) -> dict:
+        """
+        Returns the statistics of a list of timings in seconds of runs of ops operations each
+        """
+        ordered = sorted(timings)
+        summary = {"runs": len(ordered), "min": ordered[0], "max": ordered[-1], "mean": statistics.fmean(ordered)}
+        for percentile in SudokuBench.PERCENTILES:
+            summary[f"p{percentile}"] = ordered[min(len(ordered) - 1, len(ordered) * percentile // 100)]
+        summary["ops_per_second"] = ops * len(ordered) / sum(ordered) if sum(ordered) else float("inf")
+        return summary
+
+    def time(self, name: str, run: Callable[[], any], runs: int = None, ops: int = 1,
+             setup: Callable[[], any] = lambda: None):
+        """
+        Times runs calls of run, calling setup untimed before each one, and keeps the statistics under name
+        """
+        random.seed(self.seed + len(self.results))
+        timings = []
+        for i in range(runs if runs is not None else self.runs):
+            setup()
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        self.results[name] = SudokuBench.summary(timings, ops)
+
+    def bench_grid(self):
+        """
+        Times create, solution on the hard puzzles, count_solutions, remove_cells and ok_value
+        """
+        grid = sg.SudokuGrid()
+        self.time("create", grid.create, setup=grid.reset)  # the same for every solver
+
+        for solver in sg.SudokuGrid.Solver:
+            if solver == sg.SudokuGrid.Solver.backtrack:  # too slow for the hard puzzles
+                continue
+            grid = sg.SudokuGrid(solver)
+            puzzles = [sio.SudokuIO.parse(line.encode()).to_list() for line in SudokuBench.HARD]
+
+            def solve_all():
+                for puzzle in puzzles:
+                    board = puzzle[:]
+                    section = [pos for pos in range(sg.SudokuGrid.GRID_SIZE)
+                               if board[pos] == sg.SudokuGrid.INVALID_VALUE]
+                    grid.solution(board, section, len(section) - 1)
+
+            def count_all():
+                for puzzle in puzzles:
+                    grid.count_solutions(puzzle)
+
+            self.time(f"solution_hard[{solver.name}]", solve_all, ops=len(puzzles))
+            self.time(f"count_solutions_hard[{solver.name}]", count_all, ops=len(puzzles))
+
+        grid = sg.SudokuGrid()
+        self.time("remove_cells", grid.remove_cells, setup=lambda: (grid.reset(), grid.create()))
+
+        grid.reset()
+        grid.create()
+        board = grid.sol[:]
+        calls = sg.SudokuGrid.GRID_SIZE * sg.SudokuGrid.MAX_NUMBER
+
+        def ok_values():
+            for pos in range(sg.SudokuGrid.GRID_SIZE):
+                for value in range(1, sg.SudokuGrid.MAX_NUMBER + 1):
+                    grid.ok_value(board, value, pos)
+
+        self.time("ok_value", ok_values, ops=calls)
+
+    def bench_render(self):
+        """
+        Times the frame cost of SudokuGame.numbers and draw_state with the SDL dummy video driver. Skipped if
+        pygame isn't installed
+        """
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        try:
+            import sudoku_game
+        except ImportError:
+            self.results["render"] = {"skipped": "pygame isn't installed"}
+            return
+
+        cwd = os.getcwd()
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))  # the images are loaded from the game directory
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                sudoku_game.SudokuGame.BANK_FILE = os.path.join(directory, "bench.bank")
+                game = sudoku_game.SudokuGame(idle=False)
+                try:
+                    game.set_state(sudoku_game.SudokuGame.State.game)
+                    random.seed(self.seed)
+                    game.grid_reset()
+                    self.time("render_numbers", game.numbers, SudokuBench.RENDER_RUNS)
+                    self.time("render_draw_state", game.draw_state, SudokuBench.RENDER_RUNS)
+                    self.time("render_frame", game.render, SudokuBench.RENDER_RUNS,
+                              setup=lambda: setattr(game, "redraw", True))
+                    empty = [pos for pos in range(sg.SudokuGrid.GRID_SIZE)
+                             if game.sg.grid[pos] == sg.SudokuGrid.INVALID_VALUE]
+                    self.time("render_edit", game.render, SudokuBench.RENDER_RUNS,
+                              setup=lambda: game.set_cell(random.choice(empty),
+                                                          random.randint(1, sg.SudokuGrid.MAX_NUMBER)))
+                finally:
+                    game.running = False
+                    game.bank.close()
+        finally:
+            os.chdir(cwd)  # even if the game or a benchmark failed
+
+    def run(self, render: bool = True) -> dict:
+        """
+        Runs every benchmark and returns the result
+        """
+        self.bench_grid()
+        if render:
+            self.bench_render()
+        return {"python": platform.python_version(), "machine": platform.machine(), "runs": self.runs,
+                "seed": self.seed, "benchmarks": self.results}
+
+    @staticmethod
+    def compare(old: dict, new: dict, statistic: str = "p50") -> dict:
+        """
+        Returns, for every benchmark of both results, the ratio between the new and the old statistic
+        """
+        ratios = {}
+        for name, summary in new["benchmarks"].items():
+            previous = old["benchmarks"].get(name, {})
+            if statistic in summary and previous.get(statistic):
+                ratios[name] = summary[statistic] / previous[statistic]
+        return ratios
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Runs the sudoku benchmarks and prints the result as JSON")
+    parser.add_argument("-r", "--runs", type=int, default=20, help="timed runs of each benchmark")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the random number generator")
+    parser.add_argument("--no-render", action="store_true", help="skips the rendering benchmarks")
+    parser.add_argument("-o", "--output", default=None, help="file the result is written to")
+    parser.add_argument("-c", "--compare", default=None, help="previous result to compare the p50 timings with")
+    args = parser.parse_args()
+
+    result = SudokuBench(args.runs, args.seed).run(not args.no_render)
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            for name, ratio in SudokuBench.compare(json.load(file), result).items():
+                print(f"{name}\t{ratio:.2f}x", file=sys.stderr)
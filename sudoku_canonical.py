@@ -0,0 +1,211 @@
+import argparse
+import itertools
+import os
+import sys
+import sudoku_grid as sg
+import sudoku_io as sio
+from typing import Iterable
+
+
+class SudokuCanonical:
+    """
+    Maps a grid to its canonical form, the smallest grid that SudokuSymmetry can derive from it, the grids being
+    compared line by line with the empty cells as the smallest value and the digits relabeled in the order they
+    first appear. Two grids have the same canonical form if and only if one is a transform of the other.
+
+    The canonical form is built line by line keeping only the transforms that give the smallest lines so far. Only
+    the empty cells of a line change the relabeled line, so the column orders that can give the first line are
+    looked up in ORDERS by its empty cells. Transforms whose remaining lines are the same are merged, so symmetric
+    grids don't multiply the work
+    """
+
+    BOX = sg.SudokuGrid.BOX
+    SIZE = sg.SudokuGrid.MAX_NUMBER
+    EMPTY = 0  # value of the empty cells while lines are compared, smaller than every digit
+    ORDERS = {}  # bitmask of the filled cells of a line -> best column orders, see orders
+
+    @staticmethod
+    def orders(filled: int) -> tuple:
+        """
+        Returns (rank, orders): the orders of the columns keeping the columns of a stack together, the i-th column
+        of a result being order[i], that give the smallest line with the filled cells of filled, a bitmask, and that
+        line as a bitmask that is smaller for smaller lines. The best orders put the most empty cells of each stack
+        first and the stacks with the smallest parts first
+        """
+        if filled not in SudokuCanonical.ORDERS:
+            box = SudokuCanonical.BOX
+            insides = list(itertools.permutations(range(box)))
+            parts = []  # (smallest part of the line, orders of its columns that give it) of each stack
+            for stack in range(box):
+                cells = filled >> stack * box
+                ranks = [sum((cells >> col & 1) << (box - 1 - i) for i, col in enumerate(inside)) for inside in insides]
+                parts.append((min(ranks), [inside for inside, rank in zip(insides, ranks) if rank == min(ranks)]))
+            smallest = sorted(part for part, inside in parts)
+            rank = 0
+            for part in smallest:
+                rank = rank << box | part
+            orders = [tuple(stack * box + col for stack, cols in zip(stacks, inside) for col in cols)
+                      for stacks in itertools.permutations(range(box))
+                      if [parts[stack][0] for stack in stacks] == smallest
+                      for inside in itertools.product(*(parts[stack][1] for stack in stacks))]
+            SudokuCanonical.ORDERS[filled] = (rank, orders)
+        return SudokuCanonical.ORDERS[filled]
+
+    @staticmethod
+    def relabel(line: list, labels: dict) -> tuple:
+        """
+        Returns (line with the digits relabeled, labels with the digits that first appeared in line added)
+        """
+        result = []
+        for value in line:
+            if value == sg.SudokuGrid.INVALID_VALUE:
+                result.append(SudokuCanonical.EMPTY)
+            else:
+                if value not in labels:
+                    labels = dict(labels)
+                    labels[value] = len(labels) + 1
+                result.append(labels[value])
+        return result, labels
+
+    @staticmethod
+    def canonical(grid: Iterable) -> list:
+        """
+        Returns the canonical form of a grid, a list with INVALID_VALUE in the empty cells
+        """
+        size, box = SudokuCanonical.SIZE, SudokuCanonical.BOX
+        lines = [list(line) for line in zip(*[iter(grid)] * size)]
+        views = [lines, [list(col) for col in zip(*lines)]]  # the grid and its transpose
+
+        # the first line: a line of the grid, or of its transpose, with its columns in one of the best orders
+        firsts = []  # (rank, view, line, bitmask of its filled cells)
+        for view in views:
+            for line in range(size):
+                filled = sum(1 << col for col, value in enumerate(view[line]) if value != sg.SudokuGrid.INVALID_VALUE)
+                firsts.append((SudokuCanonical.orders(filled)[0], view, line, filled))
+        best = min(first[0] for first in firsts)
+
+        # a state is (view, column order, labels, lines left in the band, bands left)
+        states = []
+        for rank, view, line, filled in firsts:
+            if rank == best:
+                band = line // box
+                left = [other for other in range(band * box, band * box + box) if other != line]
+                bands = [other for other in range(box) if other != band]
+                for order in SudokuCanonical.orders(filled)[1]:
+                    result, labels = SudokuCanonical.relabel([view[line][col] for col in order], {})
+                    states.append((view, order, labels, left, bands))
+
+        for _ in range(size - 1):
+            smallest = None
+            following = {}  # key of the part of a state that decides the next lines -> state
+            for view, order, labels, left, bands in states:
+                choices = [(line, [other for other in left if other != line], bands) for line in left] if left else \
+                    [(line, [other for other in range(band * box, band * box + box) if other != line],
+                      [other for other in bands if other != band])
+                     for band in bands for line in range(band * box, band * box + box)]
+                for line, line_left, line_bands in choices:
+                    relabeled, line_labels = SudokuCanonical.relabel([view[line][col] for col in order], labels)
+                    if smallest is not None and relabeled > smallest:
+                        continue
+                    if smallest is None or relabeled < smallest:
+                        smallest = relabeled
+                        following = {}
+                    key = (tuple(sorted(line_labels.items())),
+                           tuple(sorted(tuple(view[other][col] for col in order) for other in line_left)),
+                           tuple(sorted(tuple(sorted(tuple(view[other][col] for col in order)
+                                                     for other in range(band * box, band * box + box)))
+                                        for band in line_bands)))
+                    following.setdefault(key, (view, order, line_labels, line_left, line_bands))
+            result += smallest
+            states = list(following.values())
+
+        return [sg.SudokuGrid.INVALID_VALUE if value == SudokuCanonical.EMPTY else value for value in result]
+
+    @staticmethod
+    def key(grid: Iterable) -> bytes:
+        """
+        Returns the canonical form of a grid as a line of the 81 character format, equal for two grids if and only
+        if one is a transform of the other
+        """
+        return sio.SudokuIO.serialize(SudokuCanonical.canonical(grid))
+
+
+class SudokuDedup:
+    """
+    Set of the canonical forms of puzzles, telling in O(1) if a puzzle is a transform of one already added. If it
+    has a file, the forms in it are added when the store is opened and every new form is appended to it, one per
+    line in the 81 character format
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Opens the store, keeping it in path if it isn't None
+        """
+        self.keys = set()  # canonical forms, as returned by SudokuCanonical.key
+        self.file = None
+        if path is not None:
+            if os.path.exists(path):
+                self.keys.update(sio.SudokuIO.serialize(grid) for number, grid in sio.SudokuIO.read(path)
+                                 if grid is not None)
+            self.file = open(path, "ab")
+
+    def __len__(self) -> int:
+        """
+        Returns the number of canonical forms in the store
+        """
+        return len(self.keys)
+
+    def __contains__(self, grid: Iterable) -> bool:
+        """
+        Checks if grid is a transform of a puzzle of the store
+        """
+        return SudokuCanonical.key(grid) in self.keys
+
+    def add(self, grid: Iterable) -> bool:
+        """
+        Adds a puzzle, returning False if it is a transform of one already in the store
+        """
+        return self.add_key(SudokuCanonical.key(grid))
+
+    def add_key(self, key: bytes) -> bool:
+        """
+        Adds a canonical form computed elsewhere, returning False if it is already in the store
+        """
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        if self.file is not None:
+            self.file.write(key + b"\n")
+        return True
+
+    def close(self):
+        """
+        Closes the file of the store
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Finds the puzzles of a file that are transforms of an earlier one")
+    parser.add_argument("input", help="file with the puzzles in the 81 character format")
+    parser.add_argument("-c", "--canonical", action="store_true", help="prints the canonical form of every puzzle")
+    args = parser.parse_args()
+
+    first = {}  # canonical form -> first line with it
+    duplicates = 0
+    for number, puzzle in sio.SudokuIO.read(args.input):
+        if puzzle is None:
+            print(f"line {number} skipped, it isn't a puzzle", file=sys.stderr)
+            continue
+        key = SudokuCanonical.key(puzzle)
+        if args.canonical:
+            print(key.decode())
+        if key in first:
+            duplicates += 1
+            print(f"line {number} is a transform of line {first[key]}", file=sys.stderr)
+        else:
+            first[key] = number
+    print(f"{len(first)} different puzzles, {duplicates} duplicates", file=sys.stderr)
+    sys.exit(1 if duplicates else 0)
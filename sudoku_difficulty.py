@@ -0,0 +1,258 @@
+import random
+import sudoku_grid as sg
+import sudoku_packed as packed
+from enum import Enum
+
+
+class SudokuGrader:
+    """
+    Grades puzzles by the hardest technique a human-style solver needs and by the search nodes visited when
+    counting their solutions, and removes cells from a solution until a puzzle of a given level or clue count is left
+    """
+
+    class Technique(Enum):
+        """
+        Techniques of the human-style solver, from the easiest to the hardest
+        """
+        naked_single = 1
+        hidden_single = 2
+        locked_candidates = 3
+        naked_pair = 4
+        search = 5  # no technique is enough, so guesses have to be made
+
+    class Level(Enum):
+        """
+        Difficulty tiers
+        """
+        easy = 1  # singles are enough
+        medium = 2  # locked candidates or naked pairs are needed
+        hard = 3  # guesses are needed, with a short search
+        expert = 4  # guesses are needed, with a long search
+
+    HARD_NODES = 5  # maximum number of search nodes of a hard puzzle
+    TRIES = 20  # removal orders tried on a solution before creating another one
+
+    def __init__(self, solver: sg.SudokuGrid = None):
+        """
+        Initializes the grader. solver is the grid used to count solutions and measure the search nodes
+        """
+        self.solver = solver if solver is not None else sg.SudokuGrid()
+        self.peers = [sorted({peer for unit in sg.SudokuMasks.UNITS if pos in unit for peer in unit} - {pos})
+                      for pos in range(sg.SudokuGrid.GRID_SIZE)]  # cells that share a unit with each cell
+
+    def place(self, grid: list, candidates: list, pos: int, value: int):
+        """
+        Puts value in pos, removing it from the candidates of the peers of pos
+        """
+        grid[pos] = value
+        candidates[pos] = 0
+        bit = ~(1 << (value - 1))
+        for peer in self.peers[pos]:
+            candidates[peer] &= bit
+
+    def naked_single(self, grid: list, candidates: list) -> bool:
+        """
+        Fills the cells with a single candidate. Returns True if some cell was filled
+        """
+        found = False
+        for pos in range(sg.SudokuGrid.GRID_SIZE):
+            if grid[pos] == sg.SudokuGrid.INVALID_VALUE and candidates[pos] \
+                    and not candidates[pos] & (candidates[pos] - 1):
+                self.place(grid, candidates, pos, candidates[pos].bit_length())
+                found = True
+        return found
+
+    def hidden_single(self, grid: list, candidates: list) -> bool:
+        """
+        Fills the cells that are the only place of a value in a unit. Returns True if some cell was filled
+        """
+        found = False
+        for unit in sg.SudokuMasks.UNITS:
+            once = twice = 0  # values possible in at least one and in at least two cells of the unit
+            for pos in unit:
+                twice |= once & candidates[pos]
+                once |= candidates[pos]
+            hidden = once & ~twice
+            for pos in unit:
+                if candidates[pos] & hidden:
+                    bit = candidates[pos] & hidden
+                    hidden &= ~bit
+                    self.place(grid, candidates, pos, (bit & -bit).bit_length())
+                    found = True
+        return found
+
+    @staticmethod
+    def eliminate(candidates: list, cells: list, keep: set, bit: int) -> bool:
+        """
+        Removes bit from the candidates of the cells that aren't in keep. Returns True if some candidate was removed
+        """
+        found = False
+        for pos in cells:
+            if pos not in keep and candidates[pos] & bit:
+                candidates[pos] &= ~bit
+                found = True
+        return found
+
+    def locked_candidates(self, grid: list, candidates: list) -> bool:
+        """
+        Removes a value from a line or column when in a sub grid it can only be in that line or column, and from a
+        sub grid when in a line or column it can only be in that sub grid. Returns True if some candidate was removed
+        """
+        lines = sg.SudokuMasks.UNITS[:sg.SudokuGrid.MAX_NUMBER]
+        cols = sg.SudokuMasks.UNITS[sg.SudokuGrid.MAX_NUMBER:2 * sg.SudokuGrid.MAX_NUMBER]
+        boxes = sg.SudokuMasks.UNITS[2 * sg.SudokuGrid.MAX_NUMBER:]
+        found = False
+        for value in range(sg.SudokuGrid.MAX_NUMBER):
+            bit = 1 << value
+            for box in boxes:  # pointing
+                cells = {pos for pos in box if candidates[pos] & bit}
+                if cells:
+                    for units, index in ((lines, sg.SudokuMasks.LINES), (cols, sg.SudokuMasks.COLS)):
+                        if len({index[pos] for pos in cells}) == 1:
+                            found |= SudokuGrader.eliminate(candidates, units[index[next(iter(cells))]], cells, bit)
+            for unit in lines + cols:  # claiming
+                cells = {pos for pos in unit if candidates[pos] & bit}
+                if cells and len({sg.SudokuMasks.BOXES[pos] for pos in cells}) == 1:
+                    box = boxes[sg.SudokuMasks.BOXES[next(iter(cells))]]
+                    found |= SudokuGrader.eliminate(candidates, box, cells, bit)
+        return found
+
+    @staticmethod
+    def naked_pair(grid: list, candidates: list) -> bool:
+        """
+        Removes the values of two cells of a unit with the same two candidates from the other cells of the unit.
+        Returns True if some candidate was removed
+        """
+        found = False
+        for unit in sg.SudokuMasks.UNITS:
+            pairs = {}  # cells of the unit with each pair of candidates
+            for pos in unit:
+                if candidates[pos].bit_count() == 2:
+                    pairs.setdefault(candidates[pos], set()).add(pos)
+            for pair, cells in pairs.items():
+                if len(cells) == 2:
+                    found |= SudokuGrader.eliminate(candidates, unit, cells, pair)
+        return found
+
+    def hint(self, grid: list) -> tuple:
+        """
+        Returns (pos, value, technique) of a cell the human-style solver can fill next, technique being the hardest
+        one needed to find it, or None if guesses are needed. The grid isn't changed
+        """
+        puzzle = list(grid)
+        masks = sg.SudokuMasks(puzzle)
+        candidates = [masks.candidates(pos) if value == sg.SudokuGrid.INVALID_VALUE else 0
+                      for pos, value in enumerate(puzzle)]
+        eliminations = [(SudokuGrader.Technique.locked_candidates, self.locked_candidates),
+                         (SudokuGrader.Technique.naked_pair, self.naked_pair)]
+        hardest = SudokuGrader.Technique.naked_single
+        while True:
+            for pos in range(sg.SudokuGrid.GRID_SIZE):
+                if puzzle[pos] == sg.SudokuGrid.INVALID_VALUE and candidates[pos] \
+                        and not candidates[pos] & (candidates[pos] - 1):
+                    return pos, candidates[pos].bit_length(), hardest
+            for unit in sg.SudokuMasks.UNITS:
+                once = twice = 0  # values possible in at least one and in at least two cells of the unit
+                for pos in unit:
+                    twice |= once & candidates[pos]
+                    once |= candidates[pos]
+                for pos in unit:
+                    if candidates[pos] & once & ~twice:
+                        bit = candidates[pos] & once & ~twice
+                        return pos, (bit & -bit).bit_length(), max(hardest, SudokuGrader.Technique.hidden_single,
+                                                                   key=lambda item: item.value)
+            for technique, step in eliminations:  # the easiest elimination that makes progress is used
+                if step(puzzle, candidates):
+                    hardest = max(hardest, technique, key=lambda item: item.value)
+                    break
+            else:
+                return None
+
+    def grade(self, grid: list, nodes: int = None) -> tuple:
+        """
+        Returns (level, hardest technique needed, search nodes) of a puzzle with a unique solution. nodes is the
+        number of nodes self.solver.count_solutions visited on the puzzle, counted here if it is None
+        """
+        puzzle = list(grid)
+        if nodes is None:
+            self.solver.count_solutions(puzzle)
+            nodes = self.solver.nodes
+
+        masks = sg.SudokuMasks(puzzle)
+        candidates = [masks.candidates(pos) if value == sg.SudokuGrid.INVALID_VALUE else 0
+                      for pos, value in enumerate(puzzle)]
+        steps = [(SudokuGrader.Technique.naked_single, self.naked_single),
+                 (SudokuGrader.Technique.hidden_single, self.hidden_single),
+                 (SudokuGrader.Technique.locked_candidates, self.locked_candidates),
+                 (SudokuGrader.Technique.naked_pair, self.naked_pair)]
+        hardest = SudokuGrader.Technique.naked_single
+        while sg.SudokuGrid.INVALID_VALUE in puzzle:
+            for technique, step in steps:  # the easiest technique that makes progress is used
+                if step(puzzle, candidates):
+                    hardest = max(hardest, technique, key=lambda item: item.value)
+                    break
+            else:
+                hardest = SudokuGrader.Technique.search
+                break
+
+        if hardest.value <= SudokuGrader.Technique.hidden_single.value:
+            level = SudokuGrader.Level.easy
+        elif hardest != SudokuGrader.Technique.search:
+            level = SudokuGrader.Level.medium
+        elif nodes <= SudokuGrader.HARD_NODES:
+            level = SudokuGrader.Level.hard
+        else:
+            level = SudokuGrader.Level.expert
+        return level, hardest, nodes
+
+    def remove_cells(self, sudoku: sg.SudokuGrid, level: 'SudokuGrader.Level' = None, clues: int = None,
+                     attempts: int = 100) -> bool:
+        """
+        Removes cells from sudoku.sol into sudoku.grid until a puzzle with a unique solution of the given level,
+        with at most clues clues, is left, creating sudoku.sol if it is empty. Without a target the cells are removed
+        as in SudokuGrid.remove_cells. Returns False if no puzzle reaching the targets was found in attempts removal
+        orders, sudoku.grid keeping the last puzzle tried, or if sudoku.create gave up
+
+        A cell whose removal gives more than one solution or a level above the target is never tried again in an
+        order, since removing more cells can only add solutions and rarely makes a puzzle easier. A solution gets
+        TRIES orders before another one is created
+        """
+        if sg.SudokuGrid.INVALID_VALUE in sudoku.sol and not sudoku.create():
+            return False
+        if level is None and clues is None:
+            sudoku.remove_cells()
+            return True
+
+        for attempt in range(attempts):
+            if attempt and attempt % SudokuGrader.TRIES == 0:  # the solution can't reach the targets
+                sudoku.reset()
+                if not sudoku.create():
+                    return False
+
+            grid = packed.PackedGrid(sudoku.sol)
+            pos = [i for i in range(sg.SudokuGrid.GRID_SIZE)]
+            random.shuffle(pos)
+            current = SudokuGrader.Level.easy  # level of the puzzle left
+            left = sg.SudokuGrid.GRID_SIZE  # number of clues
+
+            for cell in pos:
+                if clues is not None and left <= clues:
+                    break
+                mark = grid.snapshot()
+                grid.set(cell, sg.SudokuGrid.INVALID_VALUE)
+                if self.solver.count_solutions(grid) != 1:  # dead for any order that removes more cells
+                    grid.restore(mark)
+                    continue
+                if level is not None:
+                    removed_level = self.grade(grid, self.solver.nodes)[0]  # the nodes of the count above
+                    if removed_level.value > level.value:  # too hard
+                        grid.restore(mark)
+                        continue
+                    current = removed_level
+                left -= 1
+
+            sudoku.grid = grid.to_list()
+            if (level is None or current == level) and (clues is None or left <= clues):
+                return True
+
+        return False
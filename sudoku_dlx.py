@@ -0,0 +1,224 @@
+from typing import Callable
+
+
+class SudokuDLX:
+    """
+    Solves sudoku grids as an exact cover problem with Knuth's Dancing Links (Algorithm X).
+
+    The rows of the problem are the (cell, value) choices and its 4 * CELLS columns are the constraints: every cell
+    has a value and every line, column and sub grid has every value. The links are kept in flat lists, node 0 being
+    the root and nodes 1 to 4 * CELLS the column headers. Clues are covered before a search and uncovered after it,
+    so the same links serve every grid.
+    """
+
+    INVALID_VALUE = -1  # the value that indicates a cell is empty
+
+    def __init__(self, box: int = 3):
+        """
+        Builds the links for grids with box x box sub grids
+        """
+        self.box = box
+        self.size = box * box  # the highest number and the number of cells in a line, column or sub grid
+        self.cells = self.size * self.size  # total number of cells in the grid
+        self.max_nodes = None  # bound on the number of search nodes, None meaning no bound
+        self.nodes = 0  # number of search nodes visited by the last search
+        self.solution = []  # rows of the first solution found by the last search
+
+        columns = 4 * self.cells
+        self.left = [i - 1 for i in range(columns + 1)]
+        self.right = [i + 1 for i in range(columns + 1)]
+        self.left[0] = columns
+        self.right[columns] = 0
+        self.up = list(range(columns + 1))
+        self.down = list(range(columns + 1))
+        self.column = list(range(columns + 1))  # header of each node
+        self.row = [SudokuDLX.INVALID_VALUE] * (columns + 1)  # row of each node
+        self.sizes = [0] * (columns + 1)  # number of nodes under each header
+        self.first = []  # first node of each row
+
+        for pos in range(self.cells):
+            line, col = divmod(pos, self.size)
+            sub_grid = line // box * box + col // box
+            for value in range(self.size):
+                row = pos * self.size + value
+                self.first.append(len(self.column))
+                for header in (pos, self.cells + line * self.size + value, 2 * self.cells + col * self.size + value,
+                               3 * self.cells + sub_grid * self.size + value):
+                    self.add_node(row, header + 1)
+
+    def add_node(self, row: int, header: int):
+        """
+        Appends a node to the bottom of the column header, linking it after the previous node of row
+        """
+        node = len(self.column)
+        self.column.append(header)
+        self.row.append(row)
+        self.up.append(self.up[header])
+        self.down.append(header)
+        self.down[self.up[header]] = node
+        self.up[header] = node
+        self.sizes[header] += 1
+
+        first = self.first[row]
+        if node == first:
+            self.left.append(node)
+            self.right.append(node)
+        else:
+            self.left.append(self.left[first])
+            self.right.append(first)
+            self.right[self.left[first]] = node
+            self.left[first] = node
+
+    def cover(self, header: int):
+        """
+        Removes a column and every row that uses it
+        """
+        left, right, up, down, column, sizes = self.left, self.right, self.up, self.down, self.column, self.sizes
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                up[down[j]] = up[j]
+                down[up[j]] = down[j]
+                sizes[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, header: int):
+        """
+        Puts back a column removed by cover
+        """
+        left, right, up, down, column, sizes = self.left, self.right, self.up, self.down, self.column, self.sizes
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                sizes[column[j]] += 1
+                up[down[j]] = j
+                down[up[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def select(self, node: int):
+        """
+        Covers every column of the row of node
+        """
+        self.cover(self.column[node])
+        j = self.right[node]
+        while j != node:
+            self.cover(self.column[j])
+            j = self.right[j]
+
+    def unselect(self, node: int):
+        """
+        Undoes select
+        """
+        j = self.left[node]
+        while j != node:
+            self.uncover(self.column[j])
+            j = self.left[j]
+        self.uncover(self.column[node])
+
+    def search(self, limit: int, foo: Callable[[list], any], chosen: list) -> int:
+        """
+        Recursively counts the exact covers of the remaining columns, stopping at limit. The first one found is kept
+        in self.solution. foo alters the order of the columns with fewest rows and of the rows of the chosen column
+        """
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:  # gives up
+            return 0
+
+        right, down, sizes = self.right, self.down, self.sizes
+        if right[0] == 0:  # every column is covered
+            if not self.solution:
+                self.solution = chosen[:]
+            return 1
+
+        best = []  # columns with the fewest rows
+        fewest = self.cells + 1
+        header = right[0]
+        while header:
+            if sizes[header] < fewest:
+                best = [header]
+                fewest = sizes[header]
+            elif sizes[header] == fewest:
+                best.append(header)
+            header = right[header]
+        if not fewest:
+            return 0
+
+        foo(best)  # possibly changes which column is chosen
+        header = best.pop()
+        rows = []
+        node = down[header]
+        while node != header:
+            rows.append(node)
+            node = down[node]
+        foo(rows)  # possibly changes the order of the rows
+
+        found = 0
+        self.cover(header)
+        while rows and found < limit:
+            node = rows.pop()
+            chosen.append(self.row[node])
+            j = right[node]
+            while j != node:
+                self.cover(self.column[j])
+                j = right[j]
+            found += self.search(limit - found, foo, chosen)
+            j = self.left[node]
+            while j != node:
+                self.uncover(self.column[j])
+                j = self.left[j]
+            chosen.pop()
+        self.uncover(header)
+        return found
+
+    def run(self, grid: list, limit: int, foo: Callable[[list], any]) -> int:
+        """
+        Covers the clues of grid, searches for up to limit solutions and uncovers the clues again.
+        Returns 0 if the clues collide
+        """
+        self.nodes = 0
+        self.solution = []
+        selected = []  # first node of every clue row covered
+        covered = set()  # headers covered by the clues
+        found = 0
+
+        for pos, value in enumerate(grid):
+            if value != SudokuDLX.INVALID_VALUE:
+                node = self.first[pos * self.size + value - 1]
+                headers = {self.column[node + i] for i in range(4)}
+                if headers & covered:  # the clue collides with a previous one
+                    break
+                covered |= headers
+                self.select(node)
+                selected.append(node)
+        else:
+            found = self.search(limit, foo, [])
+
+        for node in reversed(selected):
+            self.unselect(node)
+        return found
+
+    def solve(self, grid: list, foo: Callable[[list], any] = lambda arg: None) -> bool:
+        """
+        Fills the empty cells of grid with its first solution found. foo alters the order in which the choices are
+        tried. Returns False, leaving the grid unchanged, if it has no solution
+        """
+        if not self.run(grid, 1, foo):
+            return False
+
+        for row in self.solution:
+            grid[row // self.size] = row % self.size + 1
+        return True
+
+    def count(self, grid: list, limit: int = 2) -> int:
+        """
+        Returns the number of solutions of grid, stopping as soon as limit solutions are found
+        """
+        return self.run(grid, limit, lambda arg: None)
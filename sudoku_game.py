@@ -1,5 +1,8 @@
 import pygame
+import queue
+import sudoku_bank as bank
 import sudoku_grid as sg
+import threading
 from enum import Enum
 
 
@@ -13,6 +16,8 @@ class SudokuGame:
     WIN_BACKGROUND = (220, 220, 220)  # background color of the win message
     LINE_COLOR = (128, 0, 128)  # color of the line when a cell is selected
     ERROR_TEXT_COLOR = (255, 0, 0)  # color of the grid numbers when there's conflict
+    WRONG_TEXT_COLOR = (230, 120, 0)  # color of the numbers that aren't the ones of the solution, if they are checked
+    NOTES_COLOR = (120, 120, 120)  # color of the candidates of the empty cells
     GRID_POS = (151, 51)  # position of the grid
     RES = (800, 600)  # resolution of the screen
     PLAY_CENTER = (400, 400)  # center of the play button
@@ -21,13 +26,35 @@ class SudokuGame:
     PLAY_SIZE = 32  # play button size
     TITLE_SIZE = 50  # size of the game title
     NUMBERS_SIZE = 32  # size of the numbers on the grid
+    NOTES_SIZE = 14  # size of the candidates of the empty cells
     ERROR = -1  # indicates the pressed button wasn't a number
     NO_CLICK = -1  # indicates that no click was made
     SQUARE_SIZE = 51  # size of the region that can be clicked
+    BANK_FILE = "puzzles.bank"  # file with the pre-generated puzzles
+    BANK_REFILL = 32  # number of puzzles generated when the bank is low
+    READY_PUZZLES = 3  # number of puzzles kept ready by the background worker
+    WORKER_WAIT = 0.1  # seconds the worker waits for room in the queue before checking if the game ended
+    FPS = 30  # maximum number of frames per second
+    IDLE_WAIT = 500  # milliseconds an idle game waits for an event before running the loop again
 
-    # position of the cells
-    CELLS_POS = [(47 * i + i // 3 + 151 + 20 + 4 * i, 47 * j + j // 3 + 51 + 20 + 4 * j)
-                 for j in range(9) for i in range(9)]
+    GRID_MARGIN = 20  # distance between the corner of the grid and the first cell
+    BOX_GAP = 1  # extra space between two sub grids, whose lines are thicker
+
+    @staticmethod
+    def cells_pos(box: int = sg.SudokuGrid.BOX, origin: tuple = GRID_POS, step: int = SQUARE_SIZE,
+                  margin: int = GRID_MARGIN, gap: int = BOX_GAP) -> list:
+        """
+        Returns the position of each cell of a grid with box x box sub grids drawn at origin, in the order of
+        SudokuGrid, the cells being step apart and the sub grids gap more
+        """
+        size = box * box
+        return [(origin[0] + margin + step * i + gap * (i // box), origin[1] + margin + step * j + gap * (j // box))
+                for j in range(size) for i in range(size)]
+
+    CELLS_POS = cells_pos()  # position of the cells
+    # cells whose candidates can change when a cell changes: the cells of its line, column and sub grid
+    PEERS = [sorted({cell for unit in sg.SudokuMasks.UNITS if pos in unit for cell in unit})
+             for pos in range(sg.SudokuGrid.GRID_SIZE)]
 
     class State(Enum):
         """
@@ -37,21 +64,62 @@ class SudokuGame:
         game = 2
         win = 3
 
-    def __init__(self):
+    def __init__(self, fps: int = FPS, idle: bool = True):
         """
-        Initializes the game
+        Initializes the game. fps caps the frame rate and if idle is True the loop sleeps until an event arrives
         """
         # initializes pygame
         pygame.init()
         # initializes the screen
         self.screen = pygame.display.set_mode(SudokuGame.RES)
-        self.grid_img = pygame.image.load("grid.png")
+        self.grid_img = pygame.image.load("grid.png").convert_alpha()
         pygame.display.set_caption("Sudoku")
         icon = pygame.image.load("icon.png")
         pygame.display.set_icon(icon)
+        # initializes the fonts and the surfaces of the digits and of the texts, which are rendered only once
+        self.fonts = {size: pygame.font.Font('freesansbold.ttf', size)
+                      for size in (SudokuGame.NUMBERS_SIZE, SudokuGame.PLAY_SIZE, SudokuGame.TITLE_SIZE,
+                                   SudokuGame.WIN_SIZE, SudokuGame.NOTES_SIZE)}
+        self.digits = {(value, color): self.fonts[SudokuGame.NUMBERS_SIZE].render(f"{value}", True, color,
+                                                                                  SudokuGame.SCREEN_COLOR)
+                       for value in range(1, sg.SudokuGrid.MAX_NUMBER + 1)
+                       for color in (SudokuGame.TEXT_COLOR, SudokuGame.ERROR_TEXT_COLOR, SudokuGame.WRONG_TEXT_COLOR)}
+        self.note_digits = {value: self.fonts[SudokuGame.NOTES_SIZE].render(f"{value}", True, SudokuGame.NOTES_COLOR,
+                                                                            SudokuGame.SCREEN_COLOR)
+                            for value in range(1, sg.SudokuGrid.MAX_NUMBER + 1)}
+        self.texts = {}  # surfaces drawn by button, by its arguments
+        self.menu()  # renders the texts, which are drawn again in the first frame
+        self.play_button()
+        self.win()
+        # initializes the rendering variables
+        self.clock = pygame.time.Clock()
+        self.fps = fps
+        self.idle = idle
+        self.redraw = True  # if the whole screen has to be drawn
+        self.dirty = set()  # cells that have to be drawn again
         # initializes the grid
         self.sg = sg.SudokuGrid()
         self.grid = []
+        # the number of times each value is in each unit of sg.SudokuMasks.UNITS, the cells whose value collides
+        # with another one and the number of filled cells, updated by set_cell
+        self.counts = []
+        self.conflicts = set()
+        self.filled = 0
+        # the candidate model, also updated by set_cell: the mask of the values used by each unit, the mask of the
+        # candidates of each cell, the number of cells of each unit where each value is a candidate, the cells with
+        # a single candidate, the (unit, value) with a single cell, and the cells whose value isn't the solution's
+        self.used = []
+        self.candidates = []
+        self.places = []
+        self.singles = set()
+        self.hidden = set()
+        self.wrong = set()
+        self.notes = False  # if the candidates of the empty cells are drawn
+        self.checking = False  # if the numbers that aren't the ones of the solution are drawn with WRONG_TEXT_COLOR
+        self.bank = bank.SudokuBank(SudokuGame.BANK_FILE)
+        self.bank_lock = threading.Lock()  # the bank is used by the worker and by grid_reset
+        self.ready = queue.Queue(SudokuGame.READY_PUZZLES)  # (puzzle, solution, record) ready to be played
+        self.worker = threading.Thread(target=self.prepare, daemon=True)
         # initializes game variables
         self.current_click = SudokuGame.NO_CLICK
         self.state = SudokuGame.State.menu
@@ -83,8 +151,22 @@ class SudokuGame:
                 """
                 if during the game pressed ESC goes back to the menu
                 """
-                self.state = SudokuGame.State.menu
-                self.current_click = SudokuGame.NO_CLICK
+                self.set_state(SudokuGame.State.menu)
+                self.select(SudokuGame.NO_CLICK)
+            elif self.state == SudokuGame.State.game and event.type == pygame.KEYDOWN \
+                    and event.key in (pygame.K_n, pygame.K_h, pygame.K_c):
+                """
+                if during the game pressed N shows or hides the notes, H gives a hint and C checks the numbers or stops
+                checking them
+                """
+                if event.key == pygame.K_n:
+                    self.notes = not self.notes
+                    self.redraw = True
+                elif event.key == pygame.K_c:
+                    self.checking = not self.checking
+                    self.dirty.update(self.wrong)
+                else:
+                    self.hint()
             elif event.type == pygame.KEYDOWN and self.current_click != SudokuGame.NO_CLICK \
                     and self.state == SudokuGame.State.game:
                 """
@@ -93,27 +175,27 @@ class SudokuGame:
                 """
                 number = self.number_pressed(event)
                 if number != SudokuGame.ERROR and self.sg.grid[self.current_click] == sg.SudokuGrid.INVALID_VALUE:
-                    self.grid[self.current_click] = number
+                    self.set_cell(self.current_click, number)
                 elif self.sg.grid[self.current_click] == sg.SudokuGrid.INVALID_VALUE:
-                    self.grid[self.current_click] = sg.SudokuGrid.INVALID_VALUE
-                self.current_click = SudokuGame.NO_CLICK
+                    self.set_cell(self.current_click, sg.SudokuGrid.INVALID_VALUE)
+                self.select(SudokuGame.NO_CLICK)
             elif self.state == SudokuGame.State.menu and event.type == pygame.MOUSEBUTTONUP:
                 """
                 if in the menu pressed the mouse button checks if pressed on the play button
                 """
                 if self.mouse_over_button(mouse, (360, 385), 80, 30):
-                    self.state = SudokuGame.State.game
+                    self.set_state(SudokuGame.State.game)
                     self.grid_reset()
-                    self.current_click = SudokuGame.NO_CLICK
+                    self.select(SudokuGame.NO_CLICK)
             elif self.state == SudokuGame.State.menu \
                     and event.type == pygame.KEYDOWN \
                     and (event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER):
                 """
                 if in the menu pressed Enter starts the game
                 """
-                self.state = SudokuGame.State.game
+                self.set_state(SudokuGame.State.game)
                 self.grid_reset()
-                self.current_click = SudokuGame.NO_CLICK
+                self.select(SudokuGame.NO_CLICK)
             elif self.state == SudokuGame.State.win \
                     and (event.type == pygame.MOUSEBUTTONUP
                          or (event.type == pygame.KEYDOWN
@@ -123,8 +205,8 @@ class SudokuGame:
                 """
                 if won the game and clicked on the screen or pressed ESC or Enter goes back to the menu
                 """
-                self.state = SudokuGame.State.menu
-                self.current_click = SudokuGame.NO_CLICK
+                self.set_state(SudokuGame.State.menu)
+                self.select(SudokuGame.NO_CLICK)
 
     def selected(self):
         """
@@ -144,57 +226,296 @@ class SudokuGame:
         """
         Draws the numbers on the grid. If there is a collision draws the number with ERROR_TEXT_COLOR
         """
-        font = pygame.font.Font('freesansbold.ttf', SudokuGame.NUMBERS_SIZE)
-        collisions = [self.get_collisions(i) for i in range(sg.SudokuGrid.GRID_SIZE)]
-
         for i in range(sg.SudokuGrid.GRID_SIZE):
-            if self.grid[i] != sg.SudokuGrid.INVALID_VALUE and not collisions[i]:
-                text = font.render(f"{self.grid[i]}", True, SudokuGame.TEXT_COLOR, SudokuGame.SCREEN_COLOR)
-                rect = text.get_rect()
-                rect.center = (SudokuGame.CELLS_POS[i][0] + SudokuGame.SQUARE_SIZE / 2,
-                               SudokuGame.CELLS_POS[i][1] + SudokuGame.SQUARE_SIZE / 2)
-                self.screen.blit(text, rect)
-            elif self.grid[i] != sg.SudokuGrid.INVALID_VALUE and collisions[i]:
-                text = font.render(f"{self.grid[i]}", True, SudokuGame.ERROR_TEXT_COLOR, SudokuGame.SCREEN_COLOR)
-                rect = text.get_rect()
-                rect.center = (SudokuGame.CELLS_POS[i][0] + SudokuGame.SQUARE_SIZE / 2,
-                               SudokuGame.CELLS_POS[i][1] + SudokuGame.SQUARE_SIZE / 2)
-                self.screen.blit(text, rect)
+            self.number(i)
+
+    def number(self, pos: int):
+        """
+        Draws the number of a cell, with ERROR_TEXT_COLOR if it collides with another one and WRONG_TEXT_COLOR if the
+        numbers are checked and it isn't the one of the solution, or the candidates of an empty cell if the notes are
+        shown
+        """
+        if self.grid[pos] != sg.SudokuGrid.INVALID_VALUE:
+            if pos in self.conflicts:
+                color = SudokuGame.ERROR_TEXT_COLOR
+            elif self.checking and pos in self.wrong:
+                color = SudokuGame.WRONG_TEXT_COLOR
+            else:
+                color = SudokuGame.TEXT_COLOR
+            text = self.digits[(self.grid[pos], color)]
+            rect = text.get_rect()
+            rect.center = (SudokuGame.CELLS_POS[pos][0] + SudokuGame.SQUARE_SIZE / 2,
+                           SudokuGame.CELLS_POS[pos][1] + SudokuGame.SQUARE_SIZE / 2)
+            self.screen.blit(text, rect)
+        elif self.notes:
+            box = sg.SudokuGrid.BOX
+            step = SudokuGame.SQUARE_SIZE / box  # the candidates are drawn in a box x box grid inside the cell
+            for value in range(1, sg.SudokuGrid.MAX_NUMBER + 1):
+                if self.candidates[pos] >> (value - 1) & 1:
+                    text = self.note_digits[value]
+                    rect = text.get_rect()
+                    rect.center = (SudokuGame.CELLS_POS[pos][0] + ((value - 1) % box + 0.5) * step,
+                                   SudokuGame.CELLS_POS[pos][1] + ((value - 1) // box + 0.5) * step)
+                    self.screen.blit(text, rect)
+
+    def draw_cell(self, pos: int) -> pygame.Rect:
+        """
+        Draws a cell again over what was on it, returning its rect
+        """
+        rect = pygame.Rect(SudokuGame.CELLS_POS[pos], (SudokuGame.SQUARE_SIZE, SudokuGame.SQUARE_SIZE))
+        self.screen.fill(SudokuGame.SCREEN_COLOR, rect)
+        self.number(pos)
+        self.screen.blit(self.grid_img, rect, rect.move(-SudokuGame.GRID_POS[0], -SudokuGame.GRID_POS[1]))
+        if pos == self.current_click:
+            self.selected()
+        return rect
+
+    def select(self, pos: int):
+        """
+        Selects a cell, or no cell if pos is NO_CLICK
+        """
+        for cell in (self.current_click, pos):
+            if cell != SudokuGame.NO_CLICK:
+                self.dirty.add(cell)
+        self.current_click = pos
+
+    def set_state(self, state: 'SudokuGame.State'):
+        """
+        Changes the state of the game
+        """
+        self.state = state
+        self.redraw = True
 
     def clicked(self, mouse: tuple):
         """
         Checks if the mouse is on some cell
         """
-        self.current_click = SudokuGame.NO_CLICK
+        click = SudokuGame.NO_CLICK
         i = 0  # to iterate through cells
         while i < sg.SudokuGrid.GRID_SIZE:
             # if mouse is over a cell
             if self.mouse_over_button(mouse, SudokuGame.CELLS_POS[i], SudokuGame.SQUARE_SIZE, SudokuGame.SQUARE_SIZE):
-                self.current_click = i
+                click = i
             i += 1
+        self.select(click)
 
     def grid_reset(self):
         """
-        Resets the grid to play again
-        """
-        self.sg.reset()
-        self.sg.create()
-        self.sg.remove_cells()
-        self.grid = self.sg.grid[:]
+        Resets the grid to play again, taking a puzzle prepared by the worker or getting one if none is ready
+        """
+        try:
+            self.sg.grid, self.sg.sol, record = self.ready.get_nowait()
+        except queue.Empty:
+            self.sg.grid, self.sg.sol, record = self.next_puzzle()
+        if record is not None:  # only marked as used when played, so the puzzles still ready at exit are kept
+            with self.bank_lock:
+                self.bank.use(record)
+        self.grid = [sg.SudokuGrid.INVALID_VALUE] * sg.SudokuGrid.GRID_SIZE
+        self.counts = [[0] * (sg.SudokuGrid.MAX_NUMBER + 1) for unit in sg.SudokuMasks.UNITS]
+        self.conflicts = set()
+        self.filled = 0
+        self.used = [0] * len(sg.SudokuMasks.UNITS)
+        self.candidates = [sg.SudokuMasks.FULL] * sg.SudokuGrid.GRID_SIZE
+        self.places = [[0] + [sg.SudokuGrid.MAX_NUMBER] * sg.SudokuGrid.MAX_NUMBER for unit in sg.SudokuMasks.UNITS]
+        self.singles = set()
+        self.hidden = set()
+        self.wrong = set()
+        for pos, value in enumerate(self.sg.grid):
+            self.set_cell(pos, value)
+
+    @staticmethod
+    def units(pos: int) -> tuple:
+        """
+        Returns the indexes in sg.SudokuMasks.UNITS of the line, column and sub grid of pos
+        """
+        return (sg.SudokuMasks.LINES[pos], sg.SudokuGrid.MAX_NUMBER + sg.SudokuMasks.COLS[pos],
+                2 * sg.SudokuGrid.MAX_NUMBER + sg.SudokuMasks.BOXES[pos])
+
+    def set_cell(self, pos: int, value: int):
+        """
+        Puts value in pos, updating the counts, the conflicts, the number of filled cells, the wrong cells and the
+        candidates. Only the cells of the units of pos are checked again
+        """
+        old = self.grid[pos]
+        if old == value:
+            return
+
+        units = SudokuGame.units(pos)
+        if old != sg.SudokuGrid.INVALID_VALUE:
+            self.filled -= 1
+            for unit in units:
+                self.counts[unit][old] -= 1
+        if value != sg.SudokuGrid.INVALID_VALUE:
+            self.filled += 1
+            for unit in units:
+                self.counts[unit][value] += 1
+        self.grid[pos] = value
+        self.dirty.add(pos)
+
+        for unit in units:  # only cells with the old or the new value can change
+            for cell in sg.SudokuMasks.UNITS[unit]:
+                if self.grid[cell] != sg.SudokuGrid.INVALID_VALUE and self.grid[cell] in (old, value):
+                    self.dirty.add(cell)
+                    if any(self.counts[other][self.grid[cell]] > 1 for other in SudokuGame.units(cell)):
+                        self.conflicts.add(cell)
+                    else:
+                        self.conflicts.discard(cell)
+        if value == sg.SudokuGrid.INVALID_VALUE:
+            self.conflicts.discard(pos)
+
+        if value == sg.SudokuGrid.INVALID_VALUE or value == self.sg.sol[pos]:
+            self.wrong.discard(pos)
+        else:
+            self.wrong.add(pos)
+        for unit in units:
+            for number in (old, value):
+                if number != sg.SudokuGrid.INVALID_VALUE:
+                    if self.counts[unit][number]:
+                        self.used[unit] |= 1 << (number - 1)
+                    else:
+                        self.used[unit] &= ~(1 << (number - 1))
+        for cell in SudokuGame.PEERS[pos]:
+            self.update_candidates(cell)
+
+    def update_candidates(self, pos: int):
+        """
+        Computes again the candidates of pos from the masks of its units, updating the places of the values in its
+        units, the naked and hidden singles and, if the notes are shown, the cells to draw again
+        """
+        units = SudokuGame.units(pos)
+        if self.grid[pos] == sg.SudokuGrid.INVALID_VALUE:
+            candidates = ~(self.used[units[0]] | self.used[units[1]] | self.used[units[2]]) & sg.SudokuMasks.FULL
+        else:
+            candidates = 0
+        changed = candidates ^ self.candidates[pos]
+        if not changed:
+            return
+
+        self.candidates[pos] = candidates
+        while changed:
+            bit = changed & -changed
+            changed &= ~bit
+            value = bit.bit_length()
+            for unit in units:
+                self.places[unit][value] += 1 if candidates & bit else -1
+                if self.places[unit][value] == 1:
+                    self.hidden.add((unit, value))
+                else:
+                    self.hidden.discard((unit, value))
+        if candidates and not candidates & (candidates - 1):
+            self.singles.add(pos)
+        else:
+            self.singles.discard(pos)
+        if self.notes:
+            self.dirty.add(pos)
+
+    def hint(self):
+        """
+        Shows the next logical step: selects a number that isn't the one of the solution and checks the numbers if
+        there is one, or else fills a cell with a single candidate or the only cell of a unit where a value can go,
+        or else fills the selected cell, or an empty one, with the solution
+        """
+        if self.wrong:
+            if not self.checking:
+                self.checking = True
+                self.dirty.update(self.wrong)
+            self.select(next(iter(self.wrong)))
+            return
+
+        if self.singles:
+            pos = next(iter(self.singles))
+            value = self.candidates[pos].bit_length()
+        elif self.hidden:
+            unit, value = next(iter(self.hidden))
+            pos = next(cell for cell in sg.SudokuMasks.UNITS[unit] if self.candidates[cell] >> (value - 1) & 1)
+        elif self.current_click != SudokuGame.NO_CLICK and self.grid[self.current_click] == sg.SudokuGrid.INVALID_VALUE:
+            pos = self.current_click
+            value = self.sg.sol[pos]
+        elif self.filled < sg.SudokuGrid.GRID_SIZE:
+            pos = self.grid.index(sg.SudokuGrid.INVALID_VALUE)
+            value = self.sg.sol[pos]
+        else:
+            return
+        self.set_cell(pos, value)
+        self.select(SudokuGame.NO_CLICK)
+
+    def next_puzzle(self) -> tuple:
+        """
+        Returns (puzzle, solution, record) reserved from the bank, or generated if the bank is empty, record being
+        None then
+        """
+        with self.bank_lock:
+            reserved = self.bank.reserve()
+        if reserved is not None:
+            record, puzzle, solution = reserved
+            return puzzle, solution, record
+
+        grid = sg.SudokuGrid()
+        grid.create()
+        grid.remove_cells()
+        return grid.grid, grid.sol, None
+
+    def prepare(self):
+        """
+        Runs in the background while the game is running, keeping the queue of ready puzzles full and refilling the
+        bank when it is low
+        """
+        puzzle = None
+        refilling = False  # the bank got low and isn't full again yet
+        while self.running:
+            if puzzle is None:
+                puzzle = self.next_puzzle()
+            try:
+                self.ready.put(puzzle, timeout=SudokuGame.WORKER_WAIT)
+                puzzle = None
+            except queue.Full:  # the queue is full, so there is time to refill the bank
+                with self.bank_lock:
+                    refilling = self.bank.low() or refilling and self.bank.available() < SudokuGame.BANK_REFILL
+                if refilling:
+                    generated = bank.SudokuBank.generate(1)  # one at a time so the game can end meanwhile
+                    with self.bank_lock:
+                        self.bank.add(generated)
 
     def start(self):
         """
         Starts the game
         """
+        self.worker.start()
         while self.running:  # runs game
-            self.screen.fill(SudokuGame.SCREEN_COLOR)  # fills background
+            self.event()  # checks the events
 
-            if self.grid == self.sg.sol and self.state == SudokuGame.State.game:  # checks if won the game
-                self.state = SudokuGame.State.win
+            # checks if won the game, a full grid without conflicts being the solution
+            if self.filled == sg.SudokuGrid.GRID_SIZE and not self.conflicts and self.state == SudokuGame.State.game:
+                self.set_state(SudokuGame.State.win)
 
-            self.event()  # checks the events
+            self.render()  # draws what changed
+            self.wait()  # waits for the next frame
+
+        self.worker.join()  # the worker stops when running is False
+        self.bank.close()
+
+    def render(self):
+        """
+        Draws the whole screen if the state changed, or else only the cells that changed, updating only what was drawn
+        """
+        if self.redraw or (self.dirty and self.state == SudokuGame.State.win):  # the win message is over the cells
+            self.screen.fill(SudokuGame.SCREEN_COLOR)  # fills background
             self.draw_state()  # draws according to the state
             pygame.display.update()  # updates the display
+        elif self.dirty and self.state == SudokuGame.State.game:
+            pygame.display.update([self.draw_cell(pos) for pos in self.dirty])
+        self.redraw = False
+        self.dirty.clear()
+
+    def wait(self):
+        """
+        Waits so the frame rate isn't above fps and, if the game is idle, until an event arrives
+        """
+        self.clock.tick(self.fps)
+        if self.idle:
+            event = pygame.event.wait(SudokuGame.IDLE_WAIT)
+            if event.type != pygame.NOEVENT:
+                pygame.event.post(event)  # so event() gets it
 
     def draw_state(self):
         """
@@ -212,30 +533,6 @@ class SudokuGame:
             self.draw_grid()
             self.win()
 
-    def get_collisions(self, pos: int) -> list:
-        """
-        Returns a list with the indexes of the elements that collide with the element in pos
-        """
-        cols = []
-
-        value = self.grid[pos]  # backup of the previous value
-        self.grid[pos] = sg.SudokuGrid.INVALID_VALUE  # so it doesn't interfere with the test
-
-        sub_grid = sg.SudokuGrid.sub_grids[pos]  # gets a list with the elements of the sub_grid
-        line = pos // sg.SudokuGrid.MAX_NUMBER * sg.SudokuGrid.MAX_NUMBER  # index of the first element of the line
-        col = pos % sg.SudokuGrid.MAX_NUMBER  # index of the first element of the column
-
-        for i in range(sg.SudokuGrid.MAX_NUMBER):
-            if self.grid[line + i] == value:
-                cols.append(line + i)  # checks line
-            if self.grid[col + sg.SudokuGrid.MAX_NUMBER * i] == value:  # checks column
-                cols.append(col + sg.SudokuGrid.MAX_NUMBER * i)
-            if self.grid[sub_grid[i]] == value:  # checks subgrid
-                cols.append(sub_grid[i])
-
-        self.grid[pos] = value
-        return cols
-
     def number_pressed(self, event: pygame.event.Event) -> int:
         """
         Checks the number pressed. Returns SudokuGame.ERROR if a number wasn't pressed
@@ -302,10 +599,12 @@ class SudokuGame:
         """
         Draws a button on the screen with back_color being the background color, center being the center of the
         rectangle, text being the text that will be written on the button, text_color the color of the text and
-        font_size the size of the text
+        font_size the size of the text. The text is rendered only the first time it is drawn
         """
-        font = pygame.font.Font('freesansbold.ttf', font_size)
-        rect_text = font.render(text, True, text_color, back_color)
+        key = (font_size, text, text_color, back_color)
+        if key not in self.texts:
+            self.texts[key] = self.fonts[font_size].render(text, True, text_color, back_color)
+        rect_text = self.texts[key]
         rect = rect_text.get_rect()
         rect.center = center
         self.screen.blit(rect_text, rect)
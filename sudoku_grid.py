@@ -1,5 +1,11 @@
+import argparse
 import random
-from typing import Callable
+import sudoku_dlx as dlx
+import sudoku_packed as packed
+import sudoku_stats as stats
+from contextlib import nullcontext
+from enum import Enum
+from typing import Callable, ContextManager
 
 
 class SudokuGrid:
@@ -16,53 +22,84 @@ class SudokuGrid:
     63      64      65      66      67      68      69      70      71
     72      73      74      75      76      77      78      79      80
 
+    Grids with box x box sub grids, like 4x4, 16x16 or 25x25 ones, are numbered in the same way line by line. The
+    class constants are the ones of the standard grid, and every grid has their values for its box size as attributes.
+    Grids with a box bigger than BACKTRACK_MAX_BOX or DLX_MAX_BOX are filled and counted by the propagating search
     """
 
+    BOX = 3  # number of cells in a line or column of a sub grid of the standard grid
     MAX_NUMBER = 9  # the highest number you can put in a cell and the number of cells in a line, column or subgrid
     GRID_SIZE = 81  # total number of cells in the grid
     sub_grids = {}  # dict that given a cell position returns the grid it is in
     INVALID_VALUE = -1  # the value that indicates a cell is empty
     ERROR = -1  # indicates a value for a given cell couldn't be found
     MAX_REMOVE = 35  # maximum number of removed numbers from grid
+    BACKTRACK_MAX_BOX = 3  # largest box filled by the backtracking solver, bigger grids using the propagating search
+    DLX_MAX_BOX = 3  # largest box filled or counted by the exact cover, which has no propagation, bigger grids likewise
 
-    def __init__(self):
+    class Solver(Enum):
+        """
+        Algorithms that can be used to fill a grid
+        """
+        backtrack = 1  # depth first search in the order of the given positions
+        propagate = 2  # naked and hidden singles propagation choosing the cell with fewer candidates first
+        dlx = 3  # exact cover with dancing links
+
+    def __init__(self, solver: 'SudokuGrid.Solver' = Solver.propagate, max_nodes: int = None,
+                 grid_stats: stats.SudokuStats = None, box: int = BOX):
         """
         Initializes the grid and the first time it is run initializes the sub_grids
+        max_nodes bounds the number of search nodes a call to solution can visit, None meaning no bound
+        grid_stats, if given, gets the counters and timers of the grid
+        box is the number of cells in a line of a sub grid, 3 for the standard grid
         """
-        self.grid = []  # the grid that will have missing pieces to complete
-        self.sol = [SudokuGrid.INVALID_VALUE for i in range(SudokuGrid.GRID_SIZE)]  # the grid with the solution
         if not SudokuGrid.sub_grids:
             SudokuGrid.init_sub_grids()
+        self.box = box
+        self.max_number = box * box
+        self.grid_size = self.max_number * self.max_number
+        self.sub_grids = SudokuGrid.sub_grids if box == SudokuGrid.BOX else SudokuGrid.sub_grids_of(box)
+        self.max_remove = SudokuGrid.MAX_REMOVE * self.grid_size // SudokuGrid.GRID_SIZE  # same share of the cells
+        self.grid = []  # the grid that will have missing pieces to complete
+        self.sol = [SudokuGrid.INVALID_VALUE for i in range(self.grid_size)]  # the grid with the solution
+        self.solver = solver  # algorithm used by solution
+        self.max_nodes = max_nodes
+        self.nodes = 0  # number of search nodes visited by the last call to solution
+        self.dlx = None  # exact cover solver, built the first time it is used
+        self.stats = grid_stats
+
+    @staticmethod
+    def box_size(grid_size: int) -> int:
+        """
+        Returns the box of grids of grid_size cells. Raises ValueError if there is no such box
+        """
+        box = round(grid_size ** 0.25)
+        if box ** 4 != grid_size:
+            raise ValueError(f"{grid_size} cells isn't a sudoku grid")
+        return box
+
+    @staticmethod
+    def sub_grids_of(box: int) -> dict:
+        """
+        Returns the dict that given a cell position of a grid with box x box sub grids returns the grid it is in
+        """
+        sub_grids = {}
+        for cells in SudokuMasks.tables(box)[-1][2 * box * box:]:
+            sub_grids.update(dict.fromkeys(cells, cells))
+        return sub_grids
 
     @staticmethod
     def init_sub_grids():
         """
         Initializes the dict that given a cell position returns the grid it is in
         """
-        SudokuGrid.sub_grids.update(
-            dict.fromkeys([0, 1, 2, 9, 10, 11, 18, 19, 20], [0, 1, 2, 9, 10, 11, 18, 19, 20]))
-        SudokuGrid.sub_grids.update(
-            dict.fromkeys([3, 4, 5, 12, 13, 14, 21, 22, 23], [3, 4, 5, 12, 13, 14, 21, 22, 23]))
-        SudokuGrid.sub_grids.update(
-            dict.fromkeys([6, 7, 8, 15, 16, 17, 24, 25, 26], [6, 7, 8, 15, 16, 17, 24, 25, 26]))
-        SudokuGrid.sub_grids.update(
-            dict.fromkeys([27, 28, 29, 36, 37, 38, 45, 46, 47], [27, 28, 29, 36, 37, 38, 45, 46, 47]))
-        SudokuGrid.sub_grids.update(
-            dict.fromkeys([30, 31, 32, 39, 40, 41, 48, 49, 50], [30, 31, 32, 39, 40, 41, 48, 49, 50]))
-        SudokuGrid.sub_grids.update(
-            dict.fromkeys([33, 34, 35, 42, 43, 44, 51, 52, 53], [33, 34, 35, 42, 43, 44, 51, 52, 53]))
-        SudokuGrid.sub_grids.update(
-            dict.fromkeys([54, 55, 56, 63, 64, 65, 72, 73, 74], [54, 55, 56, 63, 64, 65, 72, 73, 74]))
-        SudokuGrid.sub_grids.update(
-            dict.fromkeys([57, 58, 59, 66, 67, 68, 75, 76, 77], [57, 58, 59, 66, 67, 68, 75, 76, 77]))
-        SudokuGrid.sub_grids.update(
-            dict.fromkeys([60, 61, 62, 69, 70, 71, 78, 79, 80], [60, 61, 62, 69, 70, 71, 78, 79, 80]))
+        SudokuGrid.sub_grids.update(SudokuGrid.sub_grids_of(SudokuGrid.BOX))
 
     def reset(self):
         """
         Makes the grids return to their initial state
         """
-        self.sol = [SudokuGrid.INVALID_VALUE for i in range(SudokuGrid.GRID_SIZE)]
+        self.sol = [SudokuGrid.INVALID_VALUE for i in range(self.grid_size)]
         self.grid = []
 
     @staticmethod
@@ -70,106 +107,484 @@ class SudokuGrid:
         """
         Prints a grid
         """
+        size = SudokuGrid.box_size(len(grid)) ** 2  # number of cells in a line
         i = 0
-        while i < SudokuGrid.GRID_SIZE:
+        while i < len(grid):
             print(f"{grid[i]}\t", end="")
             i += 1
-            if i % SudokuGrid.MAX_NUMBER == 0:
+            if i % size == 0:
                 print()
 
     def ok_value(self, grid: list, value: int, pos: int) -> bool:
         """
         Checks if putting a value in a cell of a given grid is ok
         """
+        if self.stats is not None:
+            self.stats.add("ok_value")
 
         backup = grid[pos]  # backup of the previous value
         grid[pos] = SudokuGrid.INVALID_VALUE  # so it doesn't interfere with the test
 
-        sub_grid = SudokuGrid.sub_grids[pos]  # gets a list with the elements of the sub_grid
-        line = pos // SudokuGrid.MAX_NUMBER * SudokuGrid.MAX_NUMBER  # gets the index of the first element of the line
-        col = pos % SudokuGrid.MAX_NUMBER  # gets the index of the first element of the column
+        size = self.max_number
+        sub_grid = self.sub_grids[pos]  # gets a list with the elements of the sub_grid
+        line = pos // size * size  # gets the index of the first element of the line
+        col = pos % size  # gets the index of the first element of the column
 
-        for i in range(SudokuGrid.MAX_NUMBER):
-            if grid[line + i] == value or grid[col + SudokuGrid.MAX_NUMBER * i] == value or grid[sub_grid[i]] == value:
+        for i in range(size):
+            if grid[line + i] == value or grid[col + size * i] == value or grid[sub_grid[i]] == value:
                 grid[pos] = backup
                 return False
 
         grid[pos] = backup
         return True
 
-    def give_value(self, grid: list, pos: int, vals: list) -> int:
+    def give_value(self, grid: list, pos: int, vals: list, masks: 'SudokuMasks' = None) -> int:
         """
         Returns and changes the given value in the pos of the grid for a valid value from vals.
+        If masks is given it is used for the checks instead of scanning the grid and is updated with the new value
         """
+        ok_value = masks.ok_value if masks is not None else lambda value, cell: self.ok_value(grid, value, cell)
+
         number = vals.pop()  # so the value can't be used again
-        while not self.ok_value(grid, number, pos):  # if the value isn't ok
+        while not ok_value(number, pos):  # if the value isn't ok
+            if self.stats is not None and masks is not None:  # else ok_value counts itself
+                self.stats.add("ok_value")
+            if self.stats is not None:
+                self.stats.add("give_value_rejections")
             if not vals:  # if tried all the values returns ERROR
                 return SudokuGrid.ERROR
             number = vals.pop()  # tries with another value
 
+        if self.stats is not None and masks is not None:
+            self.stats.add("ok_value")
         grid[pos] = number  # if an ok value is found puts it in the grid
+        if masks is not None:
+            masks.place(pos, number)
         return number
 
-    def create(self):
+    def create(self) -> bool:
+        """
+        Creates a sudoku grid, returning False if the search gave up after max_nodes nodes. An empty grid has nothing
+        to propagate, so it is filled by the backtracking solver whatever self.solver is
+        """
+        with self.timer("create"):
+            return self.solution(self.sol, [i for i in range(self.grid_size)], self.grid_size - 1, random.shuffle,
+                                 solver=SudokuGrid.Solver.backtrack)
+
+    def timer(self, name: str) -> ContextManager:
+        """
+        Returns a context manager timing its block under name in self.stats, or doing nothing if there are no stats
+        """
+        return self.stats.timer(name) if self.stats is not None else nullcontext()
+
+    def count_nodes(self):
         """
-        Creates a sudoku grid
+        Adds the nodes visited by the last search to self.stats
         """
-        self.solution(self.sol, [i for i in range(SudokuGrid.GRID_SIZE)], SudokuGrid.GRID_SIZE - 1, random.shuffle)
+        if self.stats is not None:
+            self.stats.add("nodes", self.nodes)
 
-    def solution(self, grid: list, list_pos: list, end: int = GRID_SIZE - 1,
-                 foo: Callable[[list], any] = lambda arg: None, beg: int = 0) -> bool:
+    def solution(self, grid: list, list_pos: list, end: int = None,
+                 foo: Callable[[list], any] = lambda arg: None, beg: int = 0,
+                 solver: 'SudokuGrid.Solver' = None) -> bool:
         """
-        Recursively fills a sudoku section([list_pos[beg],list_pos[end]) from the grid
+        Fills a sudoku section([list_pos[beg],list_pos[end]) from the grid using the algorithm in solver, self.solver
+        if it is None, end being the last position if it is None
         foo alters the order of the possible variables for a cell
+        The backtracking solver is only used up to BACKTRACK_MAX_BOX and the exact cover up to DLX_MAX_BOX, as they
+        can't fill bigger grids in a sensible time
         """
-        if beg == end + 1:  # if got past the region
-            return True
+        section = list_pos[beg:end + 1 if end is not None else len(list_pos)]
+        for pos in section:  # the cells of the section are filled again
+            grid[pos] = SudokuGrid.INVALID_VALUE
 
-        vals = list(range(1, SudokuGrid.MAX_NUMBER + 1))  # creates a list of valid values for cells
-        foo(vals)  # possibly changes the order of the values
+        self.nodes = 0
+        solver = solver if solver is not None else self.solver
+        # the exact cover fills every empty cell, so other sections are left to the propagating search
+        if solver == SudokuGrid.Solver.dlx and self.box <= SudokuGrid.DLX_MAX_BOX \
+                and grid.count(SudokuGrid.INVALID_VALUE) == len(section):
+            cover = self.exact_cover()
+            found = cover.solve(grid, foo)
+            self.nodes = cover.nodes
+        elif solver != SudokuGrid.Solver.backtrack or self.box > SudokuGrid.BACKTRACK_MAX_BOX:
+            masks = SudokuMasks(grid, self.box)
+            found = self.search(grid, masks, section, self.closed_units(grid, masks, section), foo, [])
+        else:
+            found = self.fill(grid, SudokuMasks(grid, self.box), section, foo)
+        self.count_nodes()
+        return found
 
-        number = self.give_value(grid, list_pos[beg], vals)  # tries to give a valid value to put in a cell
-        if number == SudokuGrid.ERROR:  # if can't give a valid value
+    def fill(self, grid: list, masks: 'SudokuMasks', section: list, foo: Callable[[list], any],
+             beg: int = 0) -> bool:
+        """
+        Recursively fills the cells section[beg:] of the grid keeping masks up to date with the grid
+        foo alters the order of the possible variables for a cell
+        """
+        if beg == len(section):  # if got past the region
+            return True
+
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:  # gives up
             return False
+        if self.stats is not None:
+            self.stats.depth(beg)
 
-        while not self.solution(grid, list_pos, end, foo, beg + 1):  # recursevily tries to fill the section
-            grid[list_pos[beg]] = SudokuGrid.INVALID_VALUE  # because the previous value was not ok
-            if not vals:  # if the list of values is empty
-                return False
+        pos = section[beg]
+        vals = list(range(1, self.max_number + 1))  # creates a list of valid values for cells
+        foo(vals)  # possibly changes the order of the values
 
-            number = self.give_value(grid, list_pos[beg], vals)  # tries to give a valid value to put in a cell
+        while vals:
+            number = self.give_value(grid, pos, vals, masks)  # tries to give a valid value to put in a cell
             if number == SudokuGrid.ERROR:  # if can't give a valid value
                 return False
+            if self.fill(grid, masks, section, foo, beg + 1):  # recursively tries to fill the rest of the section
+                return True
+            masks.unplace(pos, number)  # because the previous value was not ok
+            grid[pos] = SudokuGrid.INVALID_VALUE
+            if self.stats is not None:
+                self.stats.add("backtracks")
+
+        return False
+
+    @staticmethod
+    def closed_units(grid: list, masks: 'SudokuMasks', section: list) -> list:
+        """
+        Returns the lines, columns and sub grids whose empty cells are all in section. Only in them every missing
+        value has to be placed, so only they can be used to find hidden singles
+        """
+        free = set(section)
+        return [unit for unit in range(len(masks.units))
+                if all(grid[pos] != SudokuGrid.INVALID_VALUE or pos in free for pos in masks.units[unit])]
+
+    def search(self, grid: list, masks: 'SudokuMasks', section: list, units: list, foo: Callable[[list], any],
+               trail: list, depth: int = 0) -> bool:
+        """
+        Recursively fills the empty cells of section propagating singles and branching on the cell with fewer
+        candidates. Every filled position is appended to trail, and the ones of a failed branch are emptied again
+        foo alters the order of the possible variables for a cell
+        """
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:  # gives up
+            return False
+        if self.stats is not None:
+            self.stats.depth(depth)
+
+        mark = len(trail)
+        if not self.propagate(grid, masks, section, units, trail):
+            SudokuGrid.undo(grid, masks, trail, mark)
+            return False
+
+        best = SudokuGrid.most_constrained(grid, masks, section)
+        if best == SudokuGrid.INVALID_VALUE:  # every cell is filled
+            return True
+
+        candidates = masks.candidates(best)
+        vals = [value for value in range(1, masks.size + 1) if candidates >> (value - 1) & 1]
+        foo(vals)  # possibly changes the order of the values
+        while vals:
+            number = vals.pop()
+            grid[best] = number
+            masks.place(best, number)
+            trail.append(best)
+            if self.search(grid, masks, section, units, foo, trail, depth + 1):
+                return True
+            SudokuGrid.undo(grid, masks, trail, len(trail) - 1)
+            if self.stats is not None:
+                self.stats.add("backtracks")
+
+        SudokuGrid.undo(grid, masks, trail, mark)
+        return False
+
+    def count(self, grid: list, masks: 'SudokuMasks', section: list, units: list, limit: int, trail: list,
+              depth: int = 0) -> int:
+        """
+        Recursively counts the ways of filling the empty cells of section, stopping at limit. The grid is left as it
+        was given
+        """
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:  # gives up
+            return 0
+        if self.stats is not None:
+            self.stats.depth(depth)
+
+        mark = len(trail)
+        found = 0
+        if self.propagate(grid, masks, section, units, trail):
+            best = SudokuGrid.most_constrained(grid, masks, section)
+            if best == SudokuGrid.INVALID_VALUE:  # every cell is filled
+                found = 1
+            else:
+                candidates = masks.candidates(best)
+                while candidates and found < limit:
+                    bit = candidates & -candidates  # lowest candidate
+                    candidates &= ~bit
+                    grid[best] = bit.bit_length()
+                    masks.place(best, grid[best])
+                    trail.append(best)
+                    found += self.count(grid, masks, section, units, limit - found, trail, depth + 1)
+                    SudokuGrid.undo(grid, masks, trail, len(trail) - 1)
+                    if self.stats is not None:
+                        self.stats.add("backtracks")
+
+        SudokuGrid.undo(grid, masks, trail, mark)
+        return found
+
+    def count_solutions(self, grid: list, limit: int = 2) -> int:
+        """
+        Returns the number of solutions of grid, stopping as soon as limit solutions are found. The grid isn't
+        changed, every cell filled by the search being emptied again. The count is only exact if self.nodes didn't
+        get past self.max_nodes. The exact cover solver is used if it is self.solver and the box isn't bigger than
+        DLX_MAX_BOX, the propagating search otherwise
+        """
+        if self.solver == SudokuGrid.Solver.dlx and self.box <= SudokuGrid.DLX_MAX_BOX:
+            solver = self.exact_cover()
+            found = solver.count(grid, limit)
+            self.nodes = solver.nodes
+            self.count_nodes()
+            return found
+
+        if SudokuMasks.collides(grid):  # a grid whose clues collide has no solution
+            return 0
+        masks = SudokuMasks(grid, self.box)
+
+        section = [pos for pos in range(len(grid)) if grid[pos] == SudokuGrid.INVALID_VALUE]
+        self.nodes = 0
+        found = self.count(grid, masks, section, self.closed_units(grid, masks, section), limit, [])
+        self.count_nodes()
+        return found
+
+    def exact_cover(self) -> dlx.SudokuDLX:
+        """
+        Returns the exact cover solver of the grid, building it the first time it is needed
+        """
+        if self.dlx is None:
+            self.dlx = dlx.SudokuDLX(self.box)
+        self.dlx.max_nodes = self.max_nodes
+        return self.dlx
+
+    @staticmethod
+    def most_constrained(grid: list, masks: 'SudokuMasks', section: list) -> int:
+        """
+        Returns the empty cell of section with the fewest candidates, or SudokuGrid.INVALID_VALUE if there is none
+        """
+        best = SudokuGrid.INVALID_VALUE
+        best_count = masks.size + 1
+        for pos in section:
+            if grid[pos] == SudokuGrid.INVALID_VALUE:
+                count = masks.candidates(pos).bit_count()
+                if count < best_count:
+                    best, best_count = pos, count
+        return best
+
+    @staticmethod
+    def propagate(grid: list, masks: 'SudokuMasks', section: list, units: list, trail: list) -> bool:
+        """
+        Fills the naked singles of section and the hidden singles of units until there are no more, appending the
+        filled positions to trail. Returns False if a cell or a unit is left without a possible value
+        """
+        changed = True
+        while changed:
+            changed = False
+            for pos in section:  # naked singles
+                if grid[pos] == SudokuGrid.INVALID_VALUE:
+                    candidates = masks.candidates(pos)
+                    if not candidates:
+                        return False
+                    if not candidates & (candidates - 1):  # a single bit is set
+                        number = candidates.bit_length()
+                        grid[pos] = number
+                        masks.place(pos, number)
+                        trail.append(pos)
+                        changed = True
+
+            for unit in units:  # hidden singles
+                once = twice = 0  # values possible in at least one and in at least two cells of the unit
+                for pos in masks.units[unit]:
+                    if grid[pos] == SudokuGrid.INVALID_VALUE:
+                        candidates = masks.candidates(pos)
+                        twice |= once & candidates
+                        once |= candidates
+                missing = ~masks.unit(unit) & masks.full
+                if missing & ~once:  # a missing value has no cell to go to
+                    return False
+                hidden = missing & ~twice
+                for pos in masks.units[unit]:
+                    if hidden and grid[pos] == SudokuGrid.INVALID_VALUE and masks.candidates(pos) & hidden:
+                        bit = masks.candidates(pos) & hidden
+                        if bit & (bit - 1):  # the cell is the only place of two values
+                            return False
+                        grid[pos] = bit.bit_length()
+                        masks.place(pos, grid[pos])
+                        trail.append(pos)
+                        hidden &= ~bit
+                        changed = True
 
         return True
 
+    @staticmethod
+    def undo(grid: list, masks: 'SudokuMasks', trail: list, mark: int):
+        """
+        Empties the cells filled after the first mark positions of trail
+        """
+        while len(trail) > mark:
+            pos = trail.pop()
+            masks.unplace(pos, grid[pos])
+            grid[pos] = SudokuGrid.INVALID_VALUE
+
     def remove_cells(self):
         """
-        Removes cells from the sudoku solution
+        Removes cells from the sudoku solution, raising ValueError if it isn't complete
         """
-        self.grid = self.sol[:]  # copies the solution
-        pos = [i for i in range(SudokuGrid.GRID_SIZE)]  # creates a list with positions
+        if SudokuGrid.INVALID_VALUE in self.sol:
+            raise ValueError("the solution isn't complete, create failed or wasn't called")
+        with self.timer("remove_cells"):
+            self.remove(packed.PackedGrid(self.sol))
+
+    def remove(self, grid: packed.PackedGrid):
+        """
+        Removes cells from grid, a copy of the solution, and keeps the result in self.grid
+        """
+        pos = [i for i in range(self.grid_size)]  # creates a list with positions
         random.shuffle(pos)  # shuffles the list
         i = 0  # to iterate through pos
         removed = 0  # number of removed values
 
-        while i < len(pos) and removed < SudokuGrid.MAX_REMOVE:
-            backup = self.grid[pos[i]]  # makes a backup in case it gives two different solutions
-            self.grid[pos[i]] = SudokuGrid.INVALID_VALUE  # removes i element in pos
-            grid_1 = self.grid[:]
-            grid_2 = self.grid[:]
+        while i < len(pos) and removed < self.max_remove:
+            if self.stats is not None:
+                self.stats.add("remove_attempts")
+            mark = grid.snapshot()  # in case it gives two different solutions
+            grid.set(pos[i], SudokuGrid.INVALID_VALUE)  # removes i element in pos
 
-            self.solution(grid_1, pos, i)
-            self.solution(grid_2, pos, i, lambda x: x.reverse())
-            if grid_1 != grid_2:  # if there are two solutions puts the value back in
-                self.grid[pos[i]] = backup
+            if self.count_solutions(grid) != 1 \
+                    or (self.max_nodes is not None and self.nodes > self.max_nodes):  # if it isn't surely unique
+                grid.restore(mark)  # puts the value back in
             else:
                 removed += 1
+                if self.stats is not None:
+                    self.stats.add("removed")
             i += 1
 
+        self.grid = grid.to_list()
+
+
+class SudokuMasks:
+    """
+    Keeps for every line, column and sub grid of a sudoku grid a bitmask with the values used in it,
+    the value v being the bit 1 << (v - 1). Placing and removing a value are O(1).
+
+    The class constants are the tables of the standard grid, the tables of other box sizes being built by tables
+    """
+
+    @staticmethod
+    def build_tables(box: int) -> tuple:
+        """
+        Returns (FULL, LINES, COLS, BOXES, UNITS) of grids with box x box sub grids
+        """
+        size = box * box
+        cells = range(size * size)
+        return ((1 << size) - 1,  # mask with every value set
+                [pos // size for pos in cells],  # line of each cell
+                [pos % size for pos in cells],  # column of each cell
+                [pos // (size * box) * box + pos % size // box for pos in cells],  # sub grid of each cell
+                # cells of every line, column and sub grid, in this order
+                [[i * size + j for j in range(size)] for i in range(size)]
+                + [[j * size + i for j in range(size)] for i in range(size)]
+                + [[(i // box * box + j // box) * size + i % box * box + j % box for j in range(size)]
+                   for i in range(size)])
+
+    TABLES = {SudokuGrid.BOX: build_tables(SudokuGrid.BOX)}  # box -> tables of grids with box x box sub grids
+    FULL, LINES, COLS, BOXES, UNITS = TABLES[SudokuGrid.BOX]
+
+    @staticmethod
+    def tables(box: int) -> tuple:
+        """
+        Returns (FULL, LINES, COLS, BOXES, UNITS) of grids with box x box sub grids, building them the first time
+        """
+        if box not in SudokuMasks.TABLES:
+            SudokuMasks.TABLES[box] = SudokuMasks.build_tables(box)
+        return SudokuMasks.TABLES[box]
+
+    def __init__(self, grid: list = None, box: int = SudokuGrid.BOX):
+        """
+        Initializes the masks of a grid with box x box sub grids with the values already in grid
+        """
+        self.size = box * box  # the highest number and the number of cells in a line, column or sub grid
+        self.full, self.line_of, self.col_of, self.box_of, self.units = SudokuMasks.tables(box)
+        self.lines = [0] * self.size
+        self.cols = [0] * self.size
+        self.boxes = [0] * self.size
+        if grid is not None:
+            for pos, value in enumerate(grid):
+                if value != SudokuGrid.INVALID_VALUE:
+                    self.place(pos, value)
+
+    @staticmethod
+    def collides(grid: list) -> bool:
+        """
+        Checks if two values of grid are in the same line, column or sub grid
+        """
+        masks = SudokuMasks(box=SudokuGrid.box_size(len(grid)))
+        for pos, value in enumerate(grid):
+            if value != SudokuGrid.INVALID_VALUE:
+                if not masks.ok_value(value, pos):
+                    return True
+                masks.place(pos, value)
+        return False
+
+    def place(self, pos: int, value: int):
+        """
+        Marks value as used in the line, column and sub grid of pos
+        """
+        bit = 1 << (value - 1)
+        self.lines[self.line_of[pos]] |= bit
+        self.cols[self.col_of[pos]] |= bit
+        self.boxes[self.box_of[pos]] |= bit
+
+    def unplace(self, pos: int, value: int):
+        """
+        Marks value as unused in the line, column and sub grid of pos
+        """
+        bit = ~(1 << (value - 1))
+        self.lines[self.line_of[pos]] &= bit
+        self.cols[self.col_of[pos]] &= bit
+        self.boxes[self.box_of[pos]] &= bit
+
+    def used(self, pos: int) -> int:
+        """
+        Returns the mask of the values used by the line, column and sub grid of pos
+        """
+        return self.lines[self.line_of[pos]] | self.cols[self.col_of[pos]] | self.boxes[self.box_of[pos]]
+
+    def unit(self, unit: int) -> int:
+        """
+        Returns the mask of the values used by a unit of self.units
+        """
+        if unit < self.size:
+            return self.lines[unit]
+        if unit < 2 * self.size:
+            return self.cols[unit - self.size]
+        return self.boxes[unit - 2 * self.size]
+
+    def candidates(self, pos: int) -> int:
+        """
+        Returns the mask of the values that can be put in pos
+        """
+        return ~self.used(pos) & self.full
+
+    def ok_value(self, value: int, pos: int) -> bool:
+        """
+        Checks if putting value in pos is ok. pos must be empty
+        """
+        return not self.used(pos) >> (value - 1) & 1
+
 
 if __name__ == '__main__':
-    val = SudokuGrid()
+    parser = argparse.ArgumentParser(description="Creates a puzzle and prints it and its solution")
+    parser.add_argument("-b", "--box", type=int, default=SudokuGrid.BOX,
+                        help="number of cells in a line of a sub grid, 2, 3, 4 or 5 for 4x4, 9x9, 16x16 or 25x25 grids")
+    args = parser.parse_args()
+
+    val = SudokuGrid(box=args.box)
     val.create()  # creates the solution
     val.remove_cells()  # removes grids
     SudokuGrid.print_grid(val.grid)  # grid with numbers removed
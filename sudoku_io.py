@@ -0,0 +1,160 @@
+import argparse
+import io
+import mmap
+import os
+import sys
+import sudoku_grid as sg
+import sudoku_packed as packed
+from typing import BinaryIO, Iterable, Iterator
+
+
+class SudokuIO:
+    """
+    Reads and writes puzzles in the line format: 81 characters per line, the cells in the order of SudokuGrid, with
+    "." or "0" for the empty cells.
+
+    Lines are converted with bytes.translate straight into PackedGrid, whose bytes are the cell values, so no list
+    is built per line
+    """
+
+    EMPTY_CHARS = b".0"  # characters read as empty cells
+    EMPTY_CHAR = b"."  # character written for the empty cells
+    # byte of each character in a PackedGrid, 0xFF being INVALID_VALUE as a signed byte
+    READ_TABLE = bytes.maketrans(EMPTY_CHARS + b"123456789", b"\xff\xff" + bytes(range(1, 10)))
+    WRITE_TABLE = bytes.maketrans(b"\xff" + bytes(range(1, 10)), EMPTY_CHAR + b"123456789")
+    VALID_CHARS = EMPTY_CHARS + b"123456789"
+    BUFFER_SIZE = 1 << 20  # bytes of the write buffer
+
+    @staticmethod
+    def parse(line: bytes) -> packed.PackedGrid:
+        """
+        Returns the grid of a line, which may end with a newline. Raises ValueError if it isn't a puzzle line
+        """
+        line = line.rstrip(b"\r\n")
+        if len(line) != sg.SudokuGrid.GRID_SIZE or line.translate(None, SudokuIO.VALID_CHARS):
+            raise ValueError(f"not a puzzle line: {line[:sg.SudokuGrid.GRID_SIZE]!r}")
+        grid = packed.PackedGrid()
+        grid.frombytes(line.translate(SudokuIO.READ_TABLE))
+        return grid
+
+    @staticmethod
+    def serialize(grid: Iterable) -> bytes:
+        """
+        Returns the line of a grid, a list or a PackedGrid, without the newline
+        """
+        if not isinstance(grid, packed.PackedGrid):
+            grid = packed.PackedGrid(grid)
+        return grid.tobytes().translate(SudokuIO.WRITE_TABLE)
+
+    @staticmethod
+    def read(path: str) -> Iterator[tuple]:
+        """
+        Yields (line number, grid) for every line of a puzzle file, memory-mapping it. Blank lines and lines starting
+        with "#" are skipped. A line that isn't a puzzle gives (line number, None)
+        """
+        if os.path.getsize(path) == 0:  # an empty file can't be mapped
+            return
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            number = 0
+            for line in iter(data.readline, b""):
+                number += 1
+                if line.isspace() or line.startswith(b"#"):
+                    continue
+                try:
+                    yield number, SudokuIO.parse(line)
+                except ValueError:
+                    yield number, None
+
+    @staticmethod
+    def write(out: BinaryIO, grids: Iterable) -> int:
+        """
+        Writes the lines of grids to a binary file, returning the number of lines written
+        """
+        buffered = io.BufferedWriter(out, SudokuIO.BUFFER_SIZE) if not isinstance(out, io.BufferedIOBase) else out
+        written = 0
+        for grid in grids:
+            buffered.write(SudokuIO.serialize(grid) + b"\n")
+            written += 1
+        buffered.flush()
+        return written
+
+    @staticmethod
+    def solve_file(path: str, out: BinaryIO, solver: sg.SudokuGrid.Solver = sg.SudokuGrid.Solver.propagate) -> tuple:
+        """
+        Writes the solution of every puzzle of a file to out, the puzzles without a solution being written as they
+        are. Returns (puzzles solved, lines that weren't solved)
+        """
+        grid = sg.SudokuGrid(solver)
+        solved = 0
+        failed = []
+
+        def solutions() -> Iterator[packed.PackedGrid]:
+            nonlocal solved
+            for number, puzzle in SudokuIO.read(path):
+                if puzzle is None:
+                    failed.append(number)
+                    continue
+                if sg.SudokuMasks.collides(puzzle):
+                    failed.append(number)
+                    yield puzzle
+                    continue
+                section = [pos for pos, value in enumerate(puzzle) if value == sg.SudokuGrid.INVALID_VALUE]
+                if grid.solution(puzzle, section, len(section) - 1):
+                    solved += 1
+                else:
+                    failed.append(number)
+                yield puzzle
+
+        SudokuIO.write(out, solutions())
+        return solved, failed
+
+    @staticmethod
+    def validate_file(path: str, unique: bool = True) -> dict:
+        """
+        Checks every line of a file, returning the numbers of the lines that aren't puzzles, whose clues collide and,
+        if unique is True, that don't have exactly one solution
+        """
+        grid = sg.SudokuGrid()
+        report = {"puzzles": 0, "malformed": [], "collisions": [], "not_unique": []}
+        for number, puzzle in SudokuIO.read(path):
+            if puzzle is None:
+                report["malformed"].append(number)
+                continue
+            report["puzzles"] += 1
+            if sg.SudokuMasks.collides(puzzle):
+                report["collisions"].append(number)
+            elif unique and grid.count_solutions(puzzle) != 1:
+                report["not_unique"].append(number)
+        return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Solves or validates files of puzzles in the 81 character format")
+    commands = parser.add_subparsers(dest="command", required=True)
+    solve = commands.add_parser("solve-file", help="writes the solution of every puzzle")
+    solve.add_argument("input", help="file with the puzzles")
+    solve.add_argument("-o", "--output", default="-", help="file the solutions are written to, - being stdout")
+    solve.add_argument("--solver", choices=[solver.name for solver in sg.SudokuGrid.Solver], default="propagate",
+                       help="algorithm used to solve the puzzles")
+    validate = commands.add_parser("validate-file", help="checks that every line is a puzzle with one solution")
+    validate.add_argument("input", help="file with the puzzles")
+    validate.add_argument("--no-unique", action="store_true", help="doesn't check that the solutions are unique")
+    args = parser.parse_args()
+
+    if args.command == "solve-file":
+        if args.output == "-":
+            solved, unsolved = SudokuIO.solve_file(args.input, sys.stdout.buffer, sg.SudokuGrid.Solver[args.solver])
+        else:
+            with open(args.output, "wb") as output:
+                solved, unsolved = SudokuIO.solve_file(args.input, output, sg.SudokuGrid.Solver[args.solver])
+        print(f"{solved} solved, {len(unsolved)} not solved: {unsolved[:20]}", file=sys.stderr)
+        sys.exit(1 if unsolved else 0)
+    else:
+        result = SudokuIO.validate_file(args.input, not args.no_unique)
+        print(f"{result['puzzles']} puzzles, {len(result['malformed'])} malformed lines, "
+              f"{len(result['collisions'])} with colliding clues, {len(result['not_unique'])} without a unique "
+              f"solution", file=sys.stderr)
+        for problem in ("malformed", "collisions", "not_unique"):
+            if result[problem]:
+                print(f"{problem}: {result[problem][:20]}", file=sys.stderr)
+        sys.exit(1 if result["malformed"] or result["collisions"] or result["not_unique"] else 0)
@@ -0,0 +1,68 @@
+from array import array
+
+
+class PackedGrid(array):
+    """
+    Sudoku grid stored as one signed byte per cell, with the same numbering and empty value as the lists of
+    SudokuGrid. Indexing and assignment work as in a list, and the inherited tolist, tobytes and frombytes convert
+    it to and from lists and bytes.
+
+    The changes made with set are kept in an undo trail, so a snapshot costs nothing and restoring it only writes
+    back the cells changed after it
+    """
+
+    TYPECODE = "b"  # signed char
+
+    def __new__(cls, values=()):
+        """
+        Creates the grid with the given values
+        """
+        return super().__new__(cls, PackedGrid.TYPECODE, values)
+
+    def __init__(self, values=()):
+        """
+        Initializes the undo trail
+        """
+        super().__init__()
+        self.trail = []  # (position, previous value) of every change made with set
+
+    def set(self, pos: int, value: int):
+        """
+        Puts value in pos, keeping the previous value in the trail
+        """
+        self.trail.append((pos, self[pos]))
+        self[pos] = value
+
+    def snapshot(self) -> int:
+        """
+        Returns a mark that restore can go back to
+        """
+        return len(self.trail)
+
+    def restore(self, mark: int):
+        """
+        Undoes the changes made with set after mark was taken
+        """
+        trail = self.trail
+        while len(trail) > mark:
+            pos, value = trail.pop()
+            self[pos] = value
+
+    def forget(self):
+        """
+        Keeps the current values, dropping the trail. Previous marks can't be restored anymore
+        """
+        self.trail.clear()
+
+    def to_list(self) -> list:
+        """
+        Returns the grid as a list
+        """
+        return self.tolist()
+
+    @staticmethod
+    def from_list(grid: list) -> 'PackedGrid':
+        """
+        Returns a packed copy of a list grid
+        """
+        return PackedGrid(grid)
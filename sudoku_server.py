@@ -0,0 +1,307 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sudoku_difficulty as difficulty
+import sudoku_grid as sg
+import sudoku_io as sio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+
+class SudokuServer:
+    """
+    Local HTTP service that generates, solves, validates and gives hints for puzzles, so many clients can share one
+    pool of warm worker processes. Every endpoint takes its arguments from the query string of a GET or from the
+    JSON body of a POST and answers JSON, the puzzles being strings in the 81 character format:
+
+    /generate?level=easy    {"puzzle", "solution", "level"}, level being optional
+    /solve?puzzle=...       {"solution"}
+    /validate?puzzle=...    {"valid", "complete", "solutions"}, solutions being 0, 1 or 2 for more than one
+    /hint?puzzle=...        {"pos", "value", "technique"} of the next cell a human-style solver fills, or null ones
+
+    Requests wait in a queue of QUEUE_SIZE, so clients wait when the workers are behind, and a dispatcher sends them
+    to the pool in batches of up to BATCH_SIZE requests, the waiting requests being split between the workers. A
+    batch is only sent when a worker is free, so the requests that can't be run yet stay in the queue. Solutions are
+    kept in an LRU cache of CACHE_SIZE puzzles
+    """
+
+    HOST = "127.0.0.1"  # only local clients
+    PORT = 8765
+    ENDPOINTS = ["generate", "solve", "validate", "hint"]
+    QUEUE_SIZE = 256  # requests waiting for the pool
+    BATCH_SIZE = 32  # maximum number of requests sent to a worker at once
+    CACHE_SIZE = 4096  # number of solutions kept
+    MAX_BODY = 1 << 16  # bytes of the largest request body
+    REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+               422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+    class RequestError(Exception):
+        """
+        Error answered to the client with its status
+        """
+
+        def __init__(self, status: int, message: str):
+            super().__init__(message)
+            self.status = status
+
+    def __init__(self, host: str = HOST, port: int = PORT, processes: int = None, cache_size: int = CACHE_SIZE,
+                 queue_size: int = QUEUE_SIZE):
+        """
+        Initializes the service. processes is the size of the pool, None meaning one per CPU
+        """
+        self.host = host
+        self.port = port
+        self.processes = processes
+        self.workers = processes if processes is not None else os.cpu_count() or 1  # size of the pool
+        self.cache_size = cache_size
+        self.queue_size = queue_size
+        self.cache = OrderedDict()  # puzzle -> solution, the most recently used last
+        self.queue = None  # (endpoint, argument, future) of the requests waiting for the pool
+        self.pool = None
+        self.slots = None  # workers free to take a batch
+        self.server = None
+        self.dispatcher = None
+        self.batches = set()  # batches sent to the pool and not finished
+
+    @staticmethod
+    def work(requests: list) -> list:
+        """
+        Runs a batch of requests, a list of (endpoint, argument), in a worker, returning the result of each one
+        """
+        grid = sg.SudokuGrid()
+        grader = difficulty.SudokuGrader(grid)
+        results = []
+        for endpoint, argument in requests:
+            if endpoint == "generate":
+                sudoku = sg.SudokuGrid()
+                level = difficulty.SudokuGrader.Level[argument] if argument is not None else None
+                while not grader.remove_cells(sudoku, level):
+                    sudoku.reset()
+                results.append({"puzzle": sio.SudokuIO.serialize(sudoku.grid).decode(),
+                                "solution": sio.SudokuIO.serialize(sudoku.sol).decode(),
+                                "level": (level or grader.grade(sudoku.grid)[0]).name})
+                continue
+
+            puzzle = sio.SudokuIO.parse(argument.encode()).to_list()
+            if endpoint == "solve":
+                solution = None
+                if not sg.SudokuMasks.collides(puzzle):
+                    section = [pos for pos, value in enumerate(puzzle) if value == sg.SudokuGrid.INVALID_VALUE]
+                    if grid.solution(puzzle, section):
+                        solution = sio.SudokuIO.serialize(puzzle).decode()
+                results.append({"solution": solution})
+            elif endpoint == "validate":
+                collides = sg.SudokuMasks.collides(puzzle)
+                results.append({"valid": not collides,
+                                "complete": not collides and sg.SudokuGrid.INVALID_VALUE not in puzzle,
+                                "solutions": grid.count_solutions(puzzle) if not collides else 0})
+            else:
+                hint = grader.hint(puzzle) if not sg.SudokuMasks.collides(puzzle) else None
+                pos, value, technique = hint if hint is not None else (None, None, None)
+                results.append({"pos": pos, "value": value, "technique": technique.name if technique else None})
+        return results
+
+    def cached(self, puzzle: str) -> str:
+        """
+        Returns the cached solution of puzzle, or None
+        """
+        solution = self.cache.get(puzzle)
+        if solution is not None:
+            self.cache.move_to_end(puzzle)
+        return solution
+
+    def remember(self, puzzle: str, solution: str):
+        """
+        Caches the solution of puzzle, dropping the least recently used one if the cache is full
+        """
+        self.cache[puzzle] = solution
+        self.cache.move_to_end(puzzle)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def submit(self, endpoint: str, argument) -> dict:
+        """
+        Queues a request for the pool, waiting for room in the queue, and returns its result
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((endpoint, argument, future))
+        return await future
+
+    async def dispatch(self):
+        """
+        Sends the requests of the queue to the pool in batches, waiting for a free worker before taking each one
+        """
+        while True:
+            await self.slots.acquire()
+            batch = [await self.queue.get()]
+            # the waiting requests are split between the workers, so none is idle while another has a long batch
+            size = min(SudokuServer.BATCH_SIZE, -(-(len(batch) + self.queue.qsize()) // self.workers))
+            while len(batch) < size:
+                batch.append(self.queue.get_nowait())
+            task = asyncio.ensure_future(self.run_batch(batch))
+            self.batches.add(task)
+            task.add_done_callback(self.batches.discard)
+
+    async def run_batch(self, batch: list):
+        """
+        Runs a batch of (endpoint, argument, future) in the pool, sets the result of every future and frees the
+        worker
+        """
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.pool, SudokuServer.work, [(endpoint, argument) for endpoint, argument, future in batch])
+        except Exception as error:  # every request of the batch fails
+            for endpoint, argument, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        finally:
+            self.slots.release()
+        for (endpoint, argument, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def puzzle(arguments: dict) -> str:
+        """
+        Returns the puzzle of the arguments of a request in the 81 character format, with "." in the empty cells
+        """
+        try:
+            return sio.SudokuIO.serialize(sio.SudokuIO.parse(str(arguments["puzzle"]).encode())).decode()
+        except KeyError:
+            raise SudokuServer.RequestError(400, "missing puzzle")
+        except ValueError as error:
+            raise SudokuServer.RequestError(400, str(error))
+
+    async def answer(self, endpoint: str, arguments: dict) -> dict:
+        """
+        Returns the result of a request to an endpoint
+        """
+        if endpoint == "generate":
+            level = arguments.get("level")
+            if level is not None and level not in difficulty.SudokuGrader.Level.__members__:
+                raise SudokuServer.RequestError(400, f"unknown level {level}")
+            result = await self.submit(endpoint, level)
+            self.remember(result["puzzle"], result["solution"])
+            return result
+
+        puzzle = SudokuServer.puzzle(arguments)
+        if endpoint == "solve":
+            solution = self.cached(puzzle)
+            if solution is None:
+                solution = (await self.submit(endpoint, puzzle))["solution"]
+                if solution is None:
+                    raise SudokuServer.RequestError(422, "the puzzle has no solution")
+                self.remember(puzzle, solution)
+            return {"solution": solution}
+        return await self.submit(endpoint, puzzle)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Answers the request of a connection and closes it
+        """
+        try:
+            status, result = 200, await self.request(reader)
+        except SudokuServer.RequestError as error:
+            status, result = error.status, {"error": str(error)}
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as error:
+            status, result = 500, {"error": repr(error)}
+
+        body = json.dumps(result).encode()
+        writer.write(f"HTTP/1.1 {status} {SudokuServer.REASONS[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def request(self, reader: asyncio.StreamReader) -> dict:
+        """
+        Reads a request and returns the result of its endpoint
+        """
+        try:
+            method, target, version = (await reader.readline()).decode("latin-1").split()
+        except ValueError:
+            raise SudokuServer.RequestError(400, "bad request line")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        url = urlsplit(target)
+        endpoint = url.path.strip("/")
+        if endpoint not in SudokuServer.ENDPOINTS:
+            raise SudokuServer.RequestError(404, f"unknown endpoint {url.path}")
+        arguments = dict(parse_qsl(url.query))
+        if method == "POST":
+            length = int(headers.get("content-length", 0))
+            if length > SudokuServer.MAX_BODY:
+                raise SudokuServer.RequestError(413, "body too large")
+            if length:
+                try:
+                    body = json.loads(await reader.readexactly(length))
+                except ValueError:
+                    raise SudokuServer.RequestError(400, "the body isn't JSON")
+                if not isinstance(body, dict):
+                    raise SudokuServer.RequestError(400, "the body isn't a JSON object")
+                arguments.update(body)
+        elif method != "GET":
+            raise SudokuServer.RequestError(405, f"method {method} not allowed")
+        return await self.answer(endpoint, arguments)
+
+    async def start(self):
+        """
+        Starts the pool and its workers, the dispatcher and the server
+        """
+        self.queue = asyncio.Queue(self.queue_size)
+        self.slots = asyncio.Semaphore(self.workers)
+        self.pool = ProcessPoolExecutor(self.processes, initializer=random.seed)  # so workers don't share a seed
+        # the workers are forked on the first task, so they are started before there are sockets to inherit: a
+        # worker holding the socket of a client would keep it open after it is closed here
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, os.getpid) for _ in range(self.workers)))
+        self.dispatcher = asyncio.ensure_future(self.dispatch())
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+
+    async def stop(self):
+        """
+        Stops the server, the dispatcher and the pool
+        """
+        self.server.close()
+        await self.server.wait_closed()
+        self.dispatcher.cancel()
+        self.pool.shutdown(cancel_futures=True)
+
+    async def serve(self):
+        """
+        Runs the service until it is cancelled
+        """
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Runs a local HTTP service that generates, solves, validates and "
+                                                 "gives hints for puzzles")
+    parser.add_argument("--host", default=SudokuServer.HOST, help="address the service listens on")
+    parser.add_argument("--port", type=int, default=SudokuServer.PORT, help="port the service listens on")
+    parser.add_argument("-p", "--processes", type=int, default=None, help="size of the pool, one per CPU by default")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(SudokuServer(args.host, args.port, args.processes).serve())
+    except KeyboardInterrupt:
+        pass
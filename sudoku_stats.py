@@ -0,0 +1,88 @@
+import cProfile
+import io
+import json
+import pstats
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, TextIO
+
+
+class SudokuStats:
+    """
+    Counters and timers filled by a SudokuGrid that has them. A grid without them only pays a None check in its
+    hot paths
+    """
+
+    COUNTERS = [
+        "ok_value",  # values checked for a cell
+        "give_value_rejections",  # values checked for a cell and rejected
+        "nodes",  # search nodes visited by solution and count_solutions
+        "backtracks",  # values taken back from a cell by the search
+        "remove_attempts",  # cells remove_cells tried to remove
+        "removed",  # cells remove_cells removed
+    ]
+
+    def __init__(self):
+        """
+        Initializes the counters and timers with zero
+        """
+        self.counters = dict.fromkeys(SudokuStats.COUNTERS, 0)
+        self.max_depth = 0  # deepest recursion of the search
+        self.timers = {}  # name -> seconds of every timed run
+
+    def reset(self):
+        """
+        Sets every counter and timer to zero
+        """
+        self.__init__()
+
+    def add(self, counter: str, amount: int = 1):
+        """
+        Adds amount to a counter
+        """
+        self.counters[counter] += amount
+
+    def depth(self, depth: int):
+        """
+        Records that the search got to depth
+        """
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Times the code run inside the with block under name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers.setdefault(name, []).append(time.perf_counter() - start)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the counters and a summary of the timers
+        """
+        return {"counters": dict(self.counters, max_depth=self.max_depth),
+                "timers": {name: {"runs": len(runs), "total": sum(runs), "max": max(runs), "last": runs[-1]}
+                           for name, runs in self.timers.items()}}
+
+    def dump(self, out: TextIO):
+        """
+        Writes the counters and the summary of the timers to out as JSON
+        """
+        json.dump(self.to_dict(), out, indent=2)
+
+    @staticmethod
+    def profile(function: Callable, *args, sort: str = "cumulative", lines: int = 20, out: TextIO = None, **kwargs):
+        """
+        Calls function with args and kwargs under cProfile, writing the lines most expensive entries by sort to out,
+        if it is given. Returns (result of the function, pstats.Stats)
+        """
+        profiler = cProfile.Profile()
+        result = profiler.runcall(function, *args, **kwargs)
+        stats = pstats.Stats(profiler, stream=out if out is not None else io.StringIO())
+        if out is not None:
+            stats.sort_stats(sort).print_stats(lines)
+        return result, stats
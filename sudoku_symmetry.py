@@ -0,0 +1,128 @@
+import argparse
+import random
+import sys
+import sudoku_grid as sg
+import sudoku_io as sio
+from operator import itemgetter
+from typing import Iterable, Iterator
+
+
+class SudokuSymmetry:
+    """
+    Derives new puzzles from a puzzle with a unique solution by transforms that map every sudoku grid to another
+    one: relabeling the digits, permuting the lines inside their band and the columns inside their stack, permuting
+    the bands and the stacks and transposing the grid.
+
+    A transform maps the solutions of a puzzle one to one to the solutions of the derived puzzle and every line,
+    column and sub grid to another one, so the derived puzzle has a unique solution, the transformed one, and is
+    solved by the same techniques, so it has the same level. No search is needed.
+
+    A transform is (cells, digits): cells[pos] is the cell of the original grid that goes to pos, and digits[value]
+    is the new value of value, digits[INVALID_VALUE] being INVALID_VALUE. Both are applied by C loops
+    """
+
+    def __init__(self, box: int = sg.SudokuGrid.BOX, rng: random.Random = None):
+        """
+        Initializes the transforms of grids with box x box sub grids. rng is the random number generator used to
+        choose them, the random module if None
+        """
+        self.box = box
+        self.size = box * box  # the highest number and the number of cells in a line, column or sub grid
+        self.rng = rng if rng is not None else random
+        # number of different transforms, some of which can give the same grid if it is symmetric
+        self.count = 2 * SudokuSymmetry.factorial(box) ** (2 * box + 2) * SudokuSymmetry.factorial(self.size)
+
+    @staticmethod
+    def factorial(n: int) -> int:
+        """
+        Returns n!
+        """
+        result = 1
+        for i in range(2, n + 1):
+            result *= i
+        return result
+
+    def order(self) -> list:
+        """
+        Returns a random order of the lines, or of the columns, keeping the lines of a band together
+        """
+        bands = list(range(self.box))
+        self.rng.shuffle(bands)
+        lines = []
+        for band in bands:
+            inside = list(range(band * self.box, (band + 1) * self.box))
+            self.rng.shuffle(inside)
+            lines += inside
+        return lines
+
+    def transform(self) -> tuple:
+        """
+        Returns a random transform (cells, digits)
+        """
+        lines, cols = self.order(), self.order()
+        if self.rng.random() < 0.5:  # transposes the grid
+            cells = [col * self.size + line for line in lines for col in cols]
+        else:
+            cells = [line * self.size + col for line in lines for col in cols]
+        values = list(range(1, self.size + 1))
+        self.rng.shuffle(values)
+        digits = [0] + values + [sg.SudokuGrid.INVALID_VALUE]  # so digits[-1] is INVALID_VALUE
+        return cells, digits
+
+    @staticmethod
+    def apply(grid: Iterable, cells: list, digits: list) -> list:
+        """
+        Returns grid after a transform
+        """
+        return list(map(digits.__getitem__, itemgetter(*cells)(grid)))
+
+    def derive(self, puzzle: list, solution: list) -> tuple:
+        """
+        Returns (puzzle, solution) after a random transform
+        """
+        cells, digits = self.transform()
+        return SudokuSymmetry.apply(puzzle, cells, digits), SudokuSymmetry.apply(solution, cells, digits)
+
+    def multiply(self, catalog: list, count: int, transforms: int = 1) -> Iterator[tuple]:
+        """
+        Yields count puzzles derived from catalog, a list of (puzzle, solution) or of (puzzle, solution, level) with
+        puzzles that have a unique solution, the level being kept. Every random transform is applied to up to
+        transforms different puzzles of the catalog, as drawing a transform costs more than applying it.
+        SudokuVector.derive does the same with NumPy arrays and is much faster
+        """
+        made = 0
+        while made < count:
+            cells, digits = self.transform()
+            for puzzle, solution, *rest in self.rng.sample(catalog, min(transforms, len(catalog), count - made)):
+                yield (SudokuSymmetry.apply(puzzle, cells, digits), SudokuSymmetry.apply(solution, cells, digits),
+                       *rest)
+                made += 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Derives puzzles from a catalog of puzzles with a unique solution")
+    parser.add_argument("catalog", help="file with the puzzles in the 81 character format")
+    parser.add_argument("count", type=int, help="number of puzzles derived")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the random number generator")
+    parser.add_argument("-o", "--output", default="-", help="output file, - being the standard output")
+    args = parser.parse_args()
+
+    grid = sg.SudokuGrid()
+    catalog = []
+    for number, puzzle in sio.SudokuIO.read(args.catalog):
+        if puzzle is None or grid.count_solutions(puzzle) != 1:
+            print(f"line {number} skipped, it isn't a puzzle with a unique solution", file=sys.stderr)
+            continue
+        solution = puzzle.to_list()
+        grid.solution(solution, [pos for pos, value in enumerate(solution) if value == sg.SudokuGrid.INVALID_VALUE])
+        catalog.append((puzzle, solution))
+    if not catalog:
+        sys.exit("the catalog has no puzzle with a unique solution")
+
+    puzzles = (puzzle for puzzle, solution in SudokuSymmetry(rng=random.Random(args.seed)).multiply(
+        catalog, args.count, len(catalog)))
+    if args.output == "-":
+        sio.SudokuIO.write(sys.stdout.buffer, puzzles)
+    else:
+        with open(args.output, "wb") as output:
+            sio.SudokuIO.write(output, puzzles)
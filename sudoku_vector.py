@@ -0,0 +1,134 @@
+import itertools
+import numpy as np
+import sudoku_grid as sg
+
+
+class SudokuVector:
+    """
+    Checks many grids at once with NumPy. The grids are the lines of an (N, 81) integer array, with the cells
+    numbered as in SudokuGrid and INVALID_VALUE or 0 in the empty cells.
+
+    As in SudokuMasks, a value v is the bit 1 << (v - 1) and every line, column and sub grid of every grid has the
+    mask of its values, so the work is a few operations on (N, 9) and (N, 81) arrays. The grids are processed in
+    chunks of CHUNK_SIZE lines to bound the memory of the intermediate arrays
+    """
+
+    CHUNK_SIZE = 1 << 16  # grids processed at a time
+    FULL = np.uint16(sg.SudokuMasks.FULL)
+    LINES = np.array(sg.SudokuMasks.LINES)  # line of each cell
+    COLS = np.array(sg.SudokuMasks.COLS)  # column of each cell
+    BOXES = np.array(sg.SudokuMasks.BOXES)  # sub grid of each cell
+    # cells of the lines, columns and sub grids, as (units, cells of a unit)
+    UNITS = np.array(sg.SudokuMasks.UNITS).reshape(3, sg.SudokuGrid.MAX_NUMBER, sg.SudokuGrid.MAX_NUMBER)
+    # orders of the lines of a band, or of the bands
+    PERMUTATIONS = np.array(list(itertools.permutations(range(sg.SudokuGrid.BOX))))
+
+    @staticmethod
+    def bits(grids: np.ndarray) -> np.ndarray:
+        """
+        Returns the bit of the value of every cell, 0 for the empty cells and the values out of range
+        """
+        values = grids.astype(np.int16)
+        known = (values >= 1) & (values <= sg.SudokuGrid.MAX_NUMBER)
+        return np.where(known, 1 << np.clip(values - 1, 0, 15), 0).astype(np.uint16)
+
+    @staticmethod
+    def unit_masks(bits: np.ndarray, units: np.ndarray) -> tuple:
+        """
+        Returns (used, repeated), two (N, 9) arrays with, for each of the units, the mask of its values and the mask
+        of the values that are in it more than once
+        """
+        used = np.zeros((len(bits), len(units)), np.uint16)
+        repeated = np.zeros_like(used)
+        for cell in units.T:  # the i-th cell of every unit
+            value = bits[:, cell]
+            repeated |= used & value
+            used |= value
+        return used, repeated
+
+    @staticmethod
+    def check_chunk(grids: np.ndarray) -> tuple:
+        """
+        Returns (valid, complete, conflicts, candidates) of a chunk of grids, as described in check
+        """
+        bits = SudokuVector.bits(grids)
+        lines, lines_repeated = SudokuVector.unit_masks(bits, SudokuVector.UNITS[0])
+        cols, cols_repeated = SudokuVector.unit_masks(bits, SudokuVector.UNITS[1])
+        boxes, boxes_repeated = SudokuVector.unit_masks(bits, SudokuVector.UNITS[2])
+
+        repeated = lines_repeated[:, SudokuVector.LINES] | cols_repeated[:, SudokuVector.COLS] \
+            | boxes_repeated[:, SudokuVector.BOXES]
+        conflicts = (bits & repeated) != 0
+        empty = bits == 0
+        unknown = empty & (grids != sg.SudokuGrid.INVALID_VALUE) & (grids != 0)
+        valid = ~(conflicts | unknown).any(axis=1)
+        complete = valid & ~empty.any(axis=1)
+        used = lines[:, SudokuVector.LINES] | cols[:, SudokuVector.COLS] | boxes[:, SudokuVector.BOXES]
+        candidates = np.where(empty, ~used & SudokuVector.FULL, 0).astype(np.uint16)
+        return valid, complete, conflicts, candidates
+
+    @staticmethod
+    def check(grids) -> dict:
+        """
+        Checks an (N, 81) array of grids, returning a dict with
+        valid: (N,) bool, the grid has only values in range and no two of them collide
+        complete: (N,) bool, the grid is valid and has no empty cell
+        conflicts: (N, 81) bool, the value of the cell is also in its line, column or sub grid
+        candidates: (N, 81) uint16, the mask of the values that can be put in each empty cell, 0 for the filled cells
+        """
+        grids = np.asarray(grids)
+        if grids.ndim != 2 or grids.shape[1] != sg.SudokuGrid.GRID_SIZE:
+            raise ValueError(f"expected an (N, {sg.SudokuGrid.GRID_SIZE}) array, got {grids.shape}")
+
+        n = len(grids)
+        result = {"valid": np.empty(n, bool), "complete": np.empty(n, bool),
+                  "conflicts": np.empty((n, sg.SudokuGrid.GRID_SIZE), bool),
+                  "candidates": np.empty((n, sg.SudokuGrid.GRID_SIZE), np.uint16)}
+        for start in range(0, n, SudokuVector.CHUNK_SIZE):
+            chunk = slice(start, start + SudokuVector.CHUNK_SIZE)
+            for name, value in zip(("valid", "complete", "conflicts", "candidates"),
+                                   SudokuVector.check_chunk(grids[chunk])):
+                result[name][chunk] = value
+        return result
+
+    @staticmethod
+    def orders(rng: np.random.Generator, count: int) -> np.ndarray:
+        """
+        Returns count random orders of the lines, or of the columns, keeping the lines of a band together
+        """
+        box = sg.SudokuGrid.BOX
+        permutations = SudokuVector.PERMUTATIONS
+        bands = permutations[rng.integers(len(permutations), size=count)]
+        inside = permutations[rng.integers(len(permutations), size=(count, box))]
+        return (bands[:, :, None] * box + inside).reshape(count, sg.SudokuGrid.MAX_NUMBER)
+
+    @staticmethod
+    def derive(puzzles, solutions, count: int, rng: np.random.Generator = None) -> tuple:
+        """
+        Returns (puzzles, solutions, sources), two (count, 81) arrays of puzzles derived by random transforms from
+        random puzzles of puzzles, with unique solutions, and their solutions, and the index of the puzzle each one
+        was derived from. The transforms are the ones of SudokuSymmetry, so the derived puzzles have a unique
+        solution and the level of their source. Call it once per chunk of at most CHUNK_SIZE puzzles to bound memory
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        puzzles, solutions = np.asarray(puzzles, np.int8), np.asarray(solutions, np.int8)
+        size = sg.SudokuGrid.MAX_NUMBER
+        lines, cols = SudokuVector.orders(rng, count), SudokuVector.orders(rng, count)
+        transposed = rng.random(count)[:, None] < 0.5  # the lines of the result being the columns of the source
+        sources = rng.integers(len(puzzles), size=count)
+        # the flat index of cell (i, j) of the result in puzzles is first[i] + second[j], flat indexes being the
+        # fastest to gather
+        first = np.where(transposed, lines, lines * size) + (sources * sg.SudokuGrid.GRID_SIZE)[:, None]
+        second = np.where(transposed, cols * size, cols)
+        cells = (first[:, :, None] + second[:, None, :]).reshape(count, -1)
+        # digits[:, value + 1] is the new value of value, digits[:, 0] being INVALID_VALUE
+        digits = np.empty((count, size + 2), np.int8)
+        digits[:, 0] = sg.SudokuGrid.INVALID_VALUE
+        digits[:, 1] = 0
+        digits[:, 2:] = rng.random((count, size)).argsort(axis=1) + 1
+        rows = np.arange(1, count * (size + 2) + 1, size + 2)[:, None]  # the + 1 of digits
+
+        result = []
+        for grids in (puzzles, solutions):
+            result.append(digits.ravel().take(rows + grids.ravel().take(cells)))
+        return result[0], result[1], sources